@@ -0,0 +1,242 @@
+"""
+============================================
+ANALYTICS QUERY SERVICE
+Data Analytics & Business Intelligence Project
+============================================
+
+KPI queries over the star schema built by AppleStoreETL, as Python functions
+and as a small JSON HTTP service for dashboards and the MERN app:
+
+- revenue, top categories, top products and sales by governorate, computed
+  from the rollup tables with the validate_data queries (KPI_QUERIES)
+- results are kept in an LRU cache whose entries expire after a TTL; every
+  ETL load logs itself in etl_load_log and the cache is cleared as soon as a
+  newer load is seen (checked at most every ANALYTICS_LOAD_CHECK_SECONDS)
+- queries run on a pooled engine, so a cache miss reuses an open connection;
+  the SQLite warehouse runs in WAL mode and loads do not block the readers
+
+Usage:
+    python analytics_service.py --port 8050
+
+    GET /kpi/revenue
+    GET /kpi/top-categories?limit=5
+    GET /kpi/top-products?limit=5
+    GET /kpi/sales-by-governorate
+    GET /health
+"""
+
+import os
+import json
+import argparse
+import threading
+import time
+from collections import OrderedDict
+from decimal import Decimal
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+from sqlalchemy import create_engine, inspect, text
+
+import etl_pipeline
+from etl_pipeline import KPI_QUERIES
+
+ANALYTICS_CACHE_SIZE = int(os.getenv('ANALYTICS_CACHE_SIZE', '256'))
+ANALYTICS_CACHE_TTL = float(os.getenv('ANALYTICS_CACHE_TTL', '300'))
+ANALYTICS_LOAD_CHECK_SECONDS = float(os.getenv('ANALYTICS_LOAD_CHECK_SECONDS', '1'))
+# Origin allowed to call the HTTP endpoints from a browser (the React client)
+ANALYTICS_ALLOW_ORIGIN = os.getenv('ANALYTICS_ALLOW_ORIGIN', '*')
+
+
+# ============================================
+# RESULT CACHE
+# ============================================
+class ResultCache:
+    """Thread-safe LRU cache of query results that expire after ttl seconds"""
+
+    def __init__(self, max_entries=ANALYTICS_CACHE_SIZE, ttl=ANALYTICS_CACHE_TTL):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        # Bumped by clear(): results computed before it are not stored
+        self.generation = 0
+        self.hits = self.misses = 0
+
+    def get(self, key):
+        """(True, value) for a fresh entry, (False, None) otherwise"""
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None or time.monotonic() - entry[0] > self.ttl:
+                self.entries.pop(key, None)
+                self.misses += 1
+                return False, None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return True, entry[1]
+
+    def put(self, key, value, generation):
+        """Store a result computed while the cache was at the given generation"""
+        with self.lock:
+            if generation != self.generation:
+                return
+            self.entries[key] = (time.monotonic(), value)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.generation += 1
+
+    def stats(self):
+        with self.lock:
+            return {'entries': len(self.entries), 'max_entries': self.max_entries, 'ttl_s': self.ttl,
+                    'hits': self.hits, 'misses': self.misses}
+
+
+# ============================================
+# KPI QUERIES
+# ============================================
+class WarehouseAnalytics:
+    """Cached KPI queries over the warehouse"""
+
+    def __init__(self, dw_uri=None, cache=None, load_check_seconds=ANALYTICS_LOAD_CHECK_SECONDS):
+        self.engine = create_engine(dw_uri or etl_pipeline.DW_URI, pool_pre_ping=True)
+        self.cache = cache or ResultCache()
+        self.load_check_seconds = load_check_seconds
+        self.load_id = None
+        self.checked_at = None
+        self.check_lock = threading.Lock()
+
+    def latest_load(self):
+        """load_id of the last finished ETL load (None before the first one)"""
+        if not inspect(self.engine).has_table('etl_load_log'):
+            return None
+        with self.engine.connect() as conn:
+            return conn.execute(text("SELECT MAX(load_id) FROM etl_load_log")).scalar()
+
+    def check_loads(self):
+        """Clear the cache if an ETL load finished since the last check"""
+        with self.check_lock:
+            now = time.monotonic()
+            if self.checked_at is not None and now - self.checked_at < self.load_check_seconds:
+                return
+            self.checked_at = now
+            load_id = self.latest_load()
+            if load_id != self.load_id:
+                self.cache.clear()
+                self.load_id = load_id
+
+    def query(self, name, **params):
+        """Rows of a KPI query as dicts, from the cache when possible"""
+        self.check_loads()
+        key = (name, tuple(sorted(params.items())))
+        found, rows = self.cache.get(key)
+        if found:
+            return rows
+        generation = self.cache.generation
+        with self.engine.connect() as conn:
+            rows = [dict(row) for row in conn.execute(text(KPI_QUERIES[name]), params).mappings()]
+        self.cache.put(key, rows, generation)
+        return rows
+
+    def revenue(self):
+        """Total revenue of paid orders"""
+        return self.query('revenue')[0]['revenue'] or 0
+
+    def top_categories(self, limit=5):
+        return self.query('top_categories', limit=limit)
+
+    def top_products(self, limit=5):
+        return self.query('top_products', limit=limit)
+
+    def sales_by_governorate(self):
+        return self.query('sales_by_governorate')
+
+    def invalidate(self):
+        self.cache.clear()
+
+    def close(self):
+        self.engine.dispose()
+
+
+# ============================================
+# HTTP ENDPOINTS
+# ============================================
+def json_value(value):
+    """JSON form of values json cannot encode (PostgreSQL DECIMAL sums, dates)"""
+    return float(value) if isinstance(value, Decimal) else str(value)
+
+
+def limit_param(params, default=5):
+    limit = int(params.get('limit', default))
+    if not 1 <= limit <= 1000:
+        raise ValueError(f"limit must be between 1 and 1000, got {limit}")
+    return limit
+
+
+def make_handler(analytics):
+    """Request handler class serving the KPIs of an analytics instance as JSON"""
+    routes = {
+        '/kpi/revenue': lambda params: {'revenue': analytics.revenue()},
+        '/kpi/top-categories': lambda params: analytics.top_categories(limit_param(params)),
+        '/kpi/top-products': lambda params: analytics.top_products(limit_param(params)),
+        '/kpi/sales-by-governorate': lambda params: analytics.sales_by_governorate(),
+        '/health': lambda params: {'load_id': analytics.load_id, 'cache': analytics.cache.stats()},
+    }
+
+    class KPIRequestHandler(BaseHTTPRequestHandler):
+        def send_json(self, status, payload):
+            body = json.dumps(payload, default=json_value).encode()
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.send_header('Access-Control-Allow-Origin', ANALYTICS_ALLOW_ORIGIN)
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            url = urlparse(self.path)
+            route = routes.get(url.path.rstrip('/'))
+            if route is None:
+                self.send_json(404, {'error': f"Unknown endpoint {url.path}", 'endpoints': sorted(routes)})
+                return
+            params = {key: values[-1] for key, values in parse_qs(url.query).items()}
+            start = time.perf_counter()
+            try:
+                data = route(params)
+            except ValueError as e:
+                self.send_json(400, {'error': str(e)})
+                return
+            self.send_json(200, {'data': data, 'ms': round((time.perf_counter() - start) * 1000, 3)})
+
+        def log_message(self, format, *args):
+            pass  # one line per dashboard call is too noisy
+
+    return KPIRequestHandler
+
+
+def serve(analytics, host='127.0.0.1', port=8050):
+    server = ThreadingHTTPServer((host, port), make_handler(analytics))
+    print(f"📊 Serving warehouse KPIs on http://{host}:{port}/kpi/ "
+          f"(cache {analytics.cache.max_entries} entries, TTL {analytics.cache.ttl:.0f}s)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\n⏹️  Stopping...")
+    finally:
+        server.server_close()
+        analytics.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="JSON KPI endpoints over the Apple Store Sousse warehouse")
+    parser.add_argument('--host', default='127.0.0.1', help='Interface to listen on')
+    parser.add_argument('--port', type=int, default=8050, help='Port to listen on')
+    parser.add_argument('--dw-uri', default=etl_pipeline.DW_URI, help='Warehouse to query (default: DW_URI)')
+    parser.add_argument('--cache-size', type=int, default=ANALYTICS_CACHE_SIZE, help='Cached query results')
+    parser.add_argument('--ttl', type=float, default=ANALYTICS_CACHE_TTL, help='Seconds a cached result is served')
+    args = parser.parse_args()
+
+    serve(WarehouseAnalytics(args.dw_uri, ResultCache(args.cache_size, args.ttl)), args.host, args.port)
@@ -0,0 +1,165 @@
+"""
+============================================
+BENCHMARK: WAREHOUSE ENGINES (SQLITE VS DUCKDB)
+============================================
+
+Loads the same synthetic star schema into a fresh SQLite and a fresh DuckDB
+warehouse through the regular full-load steps (shadow schema, bulk load,
+rollups, indexes, swap), then times:
+
+- the validate_data / analytics_service KPI queries (KPI_QUERIES, on the rollups)
+- dashboard queries scanning fact_sales joined to its dimensions (the Power BI
+  visuals when they query the warehouse instead of the rollups)
+- the Parquet export (pyarrow from the DataFrames for SQLite, COPY ... TO for DuckDB)
+
+Query times are the median of --repeat runs. DuckDB needs duckdb-engine
+(pip install duckdb-engine).
+
+Usage:
+    python benchmarks/bench_engines.py --sizes 100000 1000000
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+import pandas as pd
+from sqlalchemy import text
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import etl_pipeline  # noqa: E402
+from etl_pipeline import DW_TABLES, KPI_QUERIES  # noqa: E402
+from columnar_export import dataset_size  # noqa: E402
+from bench_load import build_star_schema  # noqa: E402
+
+try:
+    import duckdb_engine  # noqa: F401  (registers the duckdb:// dialect)
+except ImportError:
+    duckdb_engine = None
+
+ENGINES = {
+    'sqlite': 'sqlite:///{dir}/warehouse.db',
+    'duckdb': 'duckdb:///{dir}/warehouse.duckdb',
+}
+
+# Aggregations over fact_sales behind the dashboard visuals
+DASHBOARD_QUERIES = {
+    'monthly_revenue_by_category': """
+        SELECT t.year, t.month, p.category, SUM(f.total_amount) AS revenue, COUNT(*) AS lines
+        FROM fact_sales f
+        JOIN dim_time t ON f.time_id = t.time_id
+        JOIN dim_product p ON f.product_id = p.product_id
+        WHERE f.is_paid = TRUE
+        GROUP BY t.year, t.month, p.category
+        ORDER BY t.year, t.month, revenue DESC
+    """,
+    'top_customers': """
+        SELECT c.customer_name, COUNT(DISTINCT f.order_mongo_id) AS orders, SUM(f.total_amount) AS revenue
+        FROM fact_sales f
+        JOIN dim_customer c ON f.customer_id = c.customer_id
+        GROUP BY c.customer_name
+        ORDER BY revenue DESC
+        LIMIT 10
+    """,
+    'sales_by_city': """
+        SELECT l.city, SUM(f.quantity) AS units_sold, SUM(f.total_amount) AS revenue
+        FROM fact_sales f
+        JOIN dim_location l ON f.location_id = l.location_id
+        GROUP BY l.city
+        ORDER BY revenue DESC
+    """,
+    'weekend_vs_weekday': """
+        SELECT t.is_weekend, COUNT(DISTINCT f.order_mongo_id) AS orders, AVG(f.total_amount) AS avg_line
+        FROM fact_sales f
+        JOIN dim_time t ON f.time_id = t.time_id
+        GROUP BY t.is_weekend
+    """,
+    'payment_methods': """
+        SELECT payment_method, order_status, SUM(total_amount) AS revenue
+        FROM fact_sales
+        GROUP BY payment_method, order_status
+    """,
+}
+
+
+def timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+
+def full_load(etl):
+    """Regular full-load steps into the configured warehouse, timed per step"""
+    steps = [('create_dw_schema', etl.create_dw_schema)]
+    steps += [(f'load_{table}', lambda table=table: etl.load_table(table, getattr(etl, table)))
+              for table in DW_TABLES]
+    steps += [('build_aggregates', etl.refresh_aggregates), ('create_dw_indexes', etl.create_dw_indexes),
+              ('swap_warehouse', etl.swap_warehouse)]
+    return {name: timed(step)[1] for name, step in steps}
+
+
+def query_times(engine, repeat):
+    """Median seconds of every KPI and dashboard query"""
+    queries = {**{f'kpi_{name}': sql for name, sql in KPI_QUERIES.items()}, **DASHBOARD_QUERIES}
+    times = {}
+    with engine.connect() as conn:
+        for name, sql in queries.items():
+            runs = [timed(lambda: conn.execute(text(sql), {'limit': 5}).fetchall())[1] for _ in range(repeat)]
+            times[name] = statistics.median(runs)
+    return times
+
+
+def run_benchmark(sizes, engines, repeat):
+    loads, queries = [], []
+    for n_lines in sizes:
+        print(f"\n▶ {n_lines:,} order lines")
+        etl = build_star_schema(n_lines)
+        etl.export_format = 'parquet'
+        for engine in engines:
+            with tempfile.TemporaryDirectory() as tmp:
+                etl_pipeline.DW_URI = ENGINES[engine].format(dir=tmp)
+                etl.dw_engine, etl.bulk_loader, etl.load_stats = None, None, []
+                etl.open_datawarehouse()
+                steps = full_load(etl)
+                fact = next(s for s in etl.load_stats if s['table'] == 'fact_sales')
+                _, export_s = timed(etl.export_tables, os.path.join(tmp, 'export'))
+                # Database file plus its write-ahead log
+                database = [os.path.join(tmp, name) for name in os.listdir(tmp) if name.startswith('warehouse.')]
+                loads.append({'lines': n_lines, 'engine': engine, 'load_s': round(sum(steps.values()), 3),
+                              'fact_rows_per_s': round(fact['rows_per_second']),
+                              'aggregates_s': round(steps['build_aggregates'], 3),
+                              'indexes_s': round(steps['create_dw_indexes'], 3),
+                              'db_mb': round(sum(map(dataset_size, database)) / 1024 ** 2, 1),
+                              'parquet_export_s': round(export_s, 3)})
+                for name, seconds in query_times(etl.dw_engine, repeat).items():
+                    queries.append({'lines': n_lines, 'query': name, 'engine': engine, 'ms': seconds * 1000})
+                etl.dw_engine.dispose()
+
+    load_report = pd.DataFrame(loads)
+    print("\n📊 Full load and Parquet export")
+    print(load_report.to_string(index=False))
+
+    query_report = pd.DataFrame(queries).pivot_table(index=['lines', 'query'], columns='engine', values='ms')
+    if {'sqlite', 'duckdb'} <= set(query_report.columns):
+        query_report['speedup'] = query_report['sqlite'] / query_report['duckdb']
+    print(f"\n📊 Query time (ms, median of {repeat})")
+    print(query_report.round(2).to_string())
+    return load_report, query_report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[100_000, 1_000_000],
+                        help='Number of order lines per run')
+    parser.add_argument('--engines', nargs='+', choices=list(ENGINES), default=list(ENGINES),
+                        help='Warehouse engines to compare')
+    parser.add_argument('--repeat', type=int, default=5, help='Runs per query (the median is reported)')
+    args = parser.parse_args()
+    if 'duckdb' in args.engines and duckdb_engine is None:
+        print("⚠️  duckdb-engine is not installed (pip install duckdb-engine): benchmarking SQLite only")
+        args.engines = [engine for engine in args.engines if engine != 'duckdb']
+    run_benchmark(args.sizes, args.engines, args.repeat)
@@ -0,0 +1,194 @@
+"""
+============================================
+BENCHMARK: END-TO-END ETL PHASES
+============================================
+
+Generates synthetic users / products / orders (synthetic_data.py), serves
+them through an in-memory MongoDB stand-in and runs every AppleStoreETL phase
+against a fresh SQLite warehouse:
+
+    extract_all → transform_data → load_all → export_to_csv
+
+For each phase it records wall time, peak RSS (sampled every 10 ms) and rows
+per second, prints a table and writes the results as JSON so runs from
+different commits can be compared:
+
+    python benchmarks/bench_etl.py --sizes 10000 100000 1000000 --output before.json
+    python benchmarks/bench_etl.py --sizes 10000 100000 1000000 --baseline before.json
+
+frames_mb is the deep memory of the DataFrames the ETL still holds after the
+phase. --compact runs with compact dtypes (COMPACT_FRAMES); compare it against
+a default run to see the peak memory saved:
+
+    python benchmarks/bench_etl.py --sizes 1000000 --output default.json
+    python benchmarks/bench_etl.py --sizes 1000000 --compact --baseline default.json
+
+--extract-mode pushdown reads orders as flat order lines from an aggregation
+pipeline (EXTRACT_MODE); compare it the same way against a default run.
+"""
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from contextlib import redirect_stdout
+from datetime import datetime
+from io import StringIO
+
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import etl_pipeline  # noqa: E402
+from etl_pipeline import AppleStoreETL, DW_TABLES, current_rss_mb, frames_memory_mb  # noqa: E402
+from synthetic_data import generate_documents, InMemoryMongoClient  # noqa: E402
+
+
+class PeakRSS:
+    """Samples the process RSS in a background thread while the block runs"""
+
+    def __init__(self, interval=0.01):
+        self.interval = interval
+        self.peak_mb = None
+        self.done = threading.Event()
+
+    def sample(self):
+        rss = current_rss_mb()
+        if rss is not None:
+            self.peak_mb = max(self.peak_mb or 0.0, rss)
+
+    def watch(self):
+        while not self.done.wait(self.interval):
+            self.sample()
+
+    def __enter__(self):
+        self.sample()
+        self.thread = threading.Thread(target=self.watch, daemon=True)
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.done.set()
+        self.thread.join()
+        self.sample()
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def warehouse_rows(etl):
+    return sum(len(getattr(etl, table)) for table in DW_TABLES)
+
+
+def run_phases(etl, output_dir):
+    """(phase, function, rows handled) of the pipeline, in order"""
+    return [
+        ('extract_all', etl.extract_all,
+         lambda: len(etl.df_users) + len(etl.df_products) + len(etl.df_orders)),
+        ('transform_data', etl.transform_data, lambda: warehouse_rows(etl)),
+        ('load_all', etl.load_all, lambda: sum(stats['rows'] for stats in etl.load_stats)),
+        ('export_to_csv', lambda: etl.export_to_csv(output_dir), lambda: warehouse_rows(etl)),
+    ]
+
+
+def run_size(n_lines, workers, verbose=False, compact=False, extract_mode='documents'):
+    print(f"\n▶ {n_lines:,} order lines: generating documents...")
+    client = InMemoryMongoClient(generate_documents(n_lines))
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        etl_pipeline.MongoClient = client
+        etl_pipeline.DW_URI = f"sqlite:///{tmp}/bench.db"
+        etl = AppleStoreETL()
+        etl.workers = workers
+        etl.compact_frames = compact
+        etl.extract_mode = extract_mode
+        for phase, function, count_rows in run_phases(etl, os.path.join(tmp, 'dw_export')):
+            with PeakRSS() as rss:
+                start = time.perf_counter()
+                if verbose:
+                    function()
+                else:
+                    with redirect_stdout(StringIO()):
+                        function()
+                seconds = time.perf_counter() - start
+            rows = count_rows()
+            results.append({'lines': n_lines, 'phase': phase, 'seconds': round(seconds, 3),
+                            'peak_rss_mb': round(rss.peak_mb, 1) if rss.peak_mb is not None else None,
+                            'frames_mb': round(frames_memory_mb(etl), 1),
+                            'rows': rows, 'rows_per_second': round(rows / seconds) if seconds else None})
+            print(f"   ✓ {phase}: {seconds:.2f}s, {rows:,} rows")
+        etl.dw_engine.dispose()
+    return results
+
+
+def compare(report, baseline_path):
+    """Print each phase's time relative to a previous results file"""
+    with open(baseline_path) as f:
+        baseline = pd.DataFrame(json.load(f)['results'])
+    merged = report.merge(baseline, on=['lines', 'phase'], suffixes=('', '_baseline'))
+    merged['time_ratio'] = (merged['seconds'] / merged['seconds_baseline']).round(2)
+    merged['rss_ratio'] = (merged['peak_rss_mb'] / merged['peak_rss_mb_baseline']).round(2)
+    print(f"\n📊 Compared with {baseline_path} (ratio < 1 = faster / smaller now)")
+    columns = ['lines', 'phase', 'seconds_baseline', 'seconds', 'time_ratio',
+               'peak_rss_mb_baseline', 'peak_rss_mb', 'rss_ratio']
+    if 'frames_mb_baseline' in merged:
+        merged['frames_ratio'] = (merged['frames_mb'] / merged['frames_mb_baseline']).round(2)
+        columns += ['frames_mb_baseline', 'frames_mb', 'frames_ratio']
+    print(merged[columns].to_string(index=False))
+
+
+def run_benchmark(sizes, workers=1, output=None, baseline=None, verbose=False, compact=False,
+                  extract_mode='documents'):
+    results = []
+    for n_lines in sizes:
+        results.extend(run_size(n_lines, workers, verbose, compact, extract_mode))
+
+    report = pd.DataFrame(results)
+    print("\n📊 ETL phases (in-memory MongoDB → SQLite)")
+    print(report.to_string(index=False))
+
+    if output:
+        run_info = {
+            'commit': git_commit(),
+            'timestamp': datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'pandas': pd.__version__,
+            'cpus': os.cpu_count(),
+            'workers': workers,
+            'compact': compact,
+            'extract_mode': extract_mode,
+        }
+        with open(output, 'w') as f:
+            json.dump({'run': run_info, 'results': results}, f, indent=2)
+        print(f"\n💾 Results written to {output}")
+    if baseline:
+        compare(report, baseline)
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10_000, 100_000, 1_000_000],
+                        help='Number of order lines per run (up to 10000000)')
+    parser.add_argument('--workers', type=int, default=1,
+                        help='ETL worker threads (1 = phases run their steps sequentially)')
+    parser.add_argument('--output', help='Write the results as JSON to this file')
+    parser.add_argument('--baseline', help='JSON results of an earlier run to compare against')
+    parser.add_argument('--compact', action='store_true',
+                        help='Compact dtypes and release the raw extracts (COMPACT_FRAMES=1)')
+    parser.add_argument('--extract-mode', choices=['documents', 'pushdown'], default='documents',
+                        help='Read order documents, or flat order lines from an aggregation (EXTRACT_MODE)')
+    parser.add_argument('--verbose', action='store_true', help='Show the ETL output of every phase')
+    args = parser.parse_args()
+    run_benchmark(args.sizes, args.workers, args.output, args.baseline, args.verbose, args.compact,
+                  args.extract_mode)
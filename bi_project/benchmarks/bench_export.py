@@ -0,0 +1,73 @@
+"""
+============================================
+BENCHMARK: POWER BI EXPORT FORMATS
+============================================
+
+Exports a synthetic fact_sales table as CSV (the original export_to_csv path),
+Parquet and Arrow IPC (columnar_export, flat and partitioned by year/month)
+and reports write time, size on disk and the time to read it back into pandas.
+
+Usage:
+    python benchmarks/bench_export.py --sizes 100000 1000000
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from columnar_export import write_table, read_table, dataset_size, with_partition_columns  # noqa: E402
+from bench_load import build_star_schema  # noqa: E402
+
+
+def timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+
+def export_variants(fact, dim_time):
+    """(name, file name, write function, read function) of every export path for fact_sales"""
+    partitioned = with_partition_columns(fact, dim_time)
+    variants = [('csv', 'fact_sales.csv', lambda path: fact.to_csv(path, index=False), pd.read_csv)]
+    for fmt in ('parquet', 'arrow'):
+        variants += [
+            (fmt, 'fact_sales', lambda path, fmt=fmt: write_table(fact, path, fmt),
+             lambda path, fmt=fmt: read_table(path, fmt)),
+            (f'{fmt} (year/month)', 'fact_sales',
+             lambda path, fmt=fmt: write_table(partitioned, path, fmt, ['year', 'month']),
+             lambda path, fmt=fmt: read_table(path, fmt)),
+        ]
+    return variants
+
+
+def run_benchmark(sizes):
+    rows = []
+    for n_lines in sizes:
+        print(f"\n▶ {n_lines:,} order lines")
+        etl = build_star_schema(n_lines)
+        for name, file_name, write, read in export_variants(etl.fact_sales, etl.dim_time):
+            with tempfile.TemporaryDirectory() as tmp:
+                path = os.path.join(tmp, file_name)
+                _, write_s = timed(write, path)
+                _, read_s = timed(read, path)
+                rows.append({'lines': n_lines, 'format': name, 'write_s': round(write_s, 3),
+                             'size_mb': round(dataset_size(path) / 1024 ** 2, 2), 'read_s': round(read_s, 3)})
+
+    report = pd.DataFrame(rows)
+    print("\n📊 fact_sales export: write time, size on disk, read time")
+    print(report.to_string(index=False))
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[100_000, 1_000_000],
+                        help='Number of order lines per run')
+    args = parser.parse_args()
+    run_benchmark(args.sizes)
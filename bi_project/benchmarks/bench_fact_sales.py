@@ -0,0 +1,246 @@
+"""
+============================================
+BENCHMARK: FACT_SALES TRANSFORMATION
+============================================
+
+Compares a row-by-row FACT_SALES build (iterrows + one dict per order item:
+the original implementation, with the current tax / shipping allocation)
+with the vectorized AppleStoreETL.transform_fact_sales on synthetic orders,
+and checks that both produce the same table. quality_s is the part of the
+vectorized build spent on the data quality rules. With --partitions it also
+times the multi-process build (build_fact_sales_parallel) for each partition
+count, checking it against the single-process table.
+
+Usage:
+    python benchmarks/bench_fact_sales.py                      # 10k, 1M, 10M lines
+    python benchmarks/bench_fact_sales.py --sizes 10000 100000
+    python benchmarks/bench_fact_sales.py --legacy-max-lines 1000000
+    python benchmarks/bench_fact_sales.py --sizes 10000000 --legacy-max-lines 0 --partitions 2 4 8
+"""
+
+import argparse
+import math
+import os
+import sys
+import time
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from etl_pipeline import AppleStoreETL, allocate_cents, build_fact_lookups, build_fact_sales  # noqa: E402
+from synthetic_data import LOCATIONS, STATUSES, PAYMENT_METHODS  # noqa: E402
+
+
+def make_frames(n_lines, n_customers=5000, n_products=30, seed=42):
+    """Build df_users / df_products / df_orders shaped like the MongoDB extracts"""
+    rng = np.random.default_rng(seed)
+    created = datetime(2024, 1, 1)
+
+    df_users = pd.DataFrame({
+        '_id': [f'u{i:023x}' for i in range(n_customers + 2)],
+        'name': [f'customer {i}' for i in range(n_customers + 2)],
+        'email': [f'customer{i}@example.tn' for i in range(n_customers + 2)],
+        'isAdmin': [True, True] + [False] * n_customers,
+        'createdAt': created,
+    })
+    df_products = pd.DataFrame({
+        '_id': [f'p{i:023x}' for i in range(n_products)],
+        'name': [f'Product {i}' for i in range(n_products)],
+        'brand': 'Apple',
+        'category': [['Smartphones', 'Laptops', 'Tablets', 'Accessories'][i % 4] for i in range(n_products)],
+        'price': rng.integers(49, 3500, n_products).astype(float),
+        'description': 'Synthetic product',
+        'countInStock': rng.integers(0, 50, n_products),
+    })
+
+    # 1-4 items per order (~2.5 on average), trimmed to exactly n_lines
+    sizes = rng.integers(1, 5, n_lines // 2 + 1)
+    sizes = sizes[:np.searchsorted(np.cumsum(sizes), n_lines) + 1]
+    sizes[-1] -= sizes.sum() - n_lines
+    n_orders = len(sizes)
+
+    product_ids = df_products['_id'].to_numpy()
+    prices = df_products['price'].to_numpy()
+    line_products = rng.integers(0, n_products, n_lines)
+    line_quantities = rng.integers(1, 4, n_lines)
+    bounds = np.concatenate([[0], np.cumsum(sizes)])
+    order_items = [
+        [{'product': product_ids[p], 'name': 'item', 'price': prices[p], 'quantity': int(q)}
+         for p, q in zip(line_products[a:b], line_quantities[a:b])]
+        for a, b in zip(bounds[:-1], bounds[1:])
+    ]
+
+    customers = df_users['_id'].to_numpy()[2:]
+    locations = [{'address': '1 Rue', 'city': c, 'governorate': g, 'postalCode': pc, 'country': 'Tunisia'}
+                 for c, g, pc in LOCATIONS]
+    statuses = rng.integers(0, len(STATUSES), n_orders)
+    minutes = rng.integers(0, 366 * 24 * 60, n_orders)
+    df_orders = pd.DataFrame({
+        '_id': [f'o{i:023x}' for i in range(n_orders)],
+        'user': customers[rng.integers(0, n_customers, n_orders)],
+        'orderItems': order_items,
+        'shippingAddress': [locations[i] for i in rng.integers(0, len(locations), n_orders)],
+        'paymentMethod': np.array(PAYMENT_METHODS)[rng.integers(0, len(PAYMENT_METHODS), n_orders)],
+        'taxPrice': np.round(rng.uniform(0, 2000, n_orders), 2),
+        'shippingPrice': np.where(rng.random(n_orders) < 0.5, 0.0, 15.0),
+        'status': np.array(STATUSES)[statuses],
+        'isPaid': np.isin(statuses, [1, 2, 3]),
+        'isDelivered': statuses == 3,
+        'createdAt': pd.Timestamp(created) + pd.to_timedelta(minutes, unit='min'),
+    })
+    items_price = np.bincount(np.repeat(np.arange(n_orders), sizes), weights=prices[line_products] * line_quantities,
+                              minlength=n_orders)
+    df_orders['totalPrice'] = np.round(items_price + df_orders['taxPrice'] + df_orders['shippingPrice'], 2)
+    return df_users, df_products, df_orders
+
+
+def legacy_allocation(total, amounts):
+    """Pro-rata split of an order total over its lines in cents, largest remainder first (one order at a time)"""
+    cents = round(total * 100)
+    weights = amounts if sum(amounts) > 0 else [1.0] * len(amounts)
+    exact = [cents * weight / sum(weights) for weight in weights]
+    shares = [math.floor(share) for share in exact]
+    # Fractions equal up to float noise are ties, won by the first line
+    ranked = sorted(range(len(shares)), key=lambda i: (round((1 - (exact[i] - shares[i])) * 1e9), i))
+    for i in ranked[:cents - sum(shares)]:
+        shares[i] += 1
+    return [share / 100 for share in shares]
+
+
+def legacy_fact_sales(etl):
+    """Row-by-row FACT_SALES build (iterrows, pro-rata tax / shipping per order): the reference the
+    vectorized transform must match"""
+    customer_lookup = dict(zip(etl.dim_customer['mongo_id'], etl.dim_customer['customer_id']))
+    product_lookup = dict(zip(etl.dim_product['mongo_id'], etl.dim_product['product_id']))
+    time_lookup = dict(zip(etl.dim_time['full_date'], etl.dim_time['time_id']))
+    location_lookup = {}
+    for _, loc in etl.dim_location.iterrows():
+        location_lookup[f"{loc['city']}-{loc['governorate']}"] = loc['location_id']
+
+    fact_records = []
+    sale_id = 1
+    for _, order in etl.df_orders.iterrows():
+        customer_id = customer_lookup.get(str(order.get('user', '')), None)
+        if customer_id is None:
+            continue
+        time_id = time_lookup.get(pd.to_datetime(order['createdAt']).date(), None)
+        shipping = order.get('shippingAddress', {})
+        location_id = location_lookup.get(f"{shipping.get('city', '')}-{shipping.get('governorate', '')}", 1)
+        order_items = order.get('orderItems', [])
+        amounts = [float(item.get('price', 0)) * int(item.get('quantity', 1)) for item in order_items]
+        taxes = legacy_allocation(float(order.get('taxPrice', 0)), amounts)
+        shipping_amounts = legacy_allocation(float(order.get('shippingPrice', 0)), amounts)
+        for item, tax, shipping_amount in zip(order_items, taxes, shipping_amounts):
+            product_id = product_lookup.get(str(item.get('product', '')), None)
+            if product_id is None:
+                continue
+            fact_records.append({
+                'sale_id': sale_id,
+                'time_id': time_id,
+                'product_id': product_id,
+                'customer_id': customer_id,
+                'location_id': location_id,
+                'order_mongo_id': str(order['_id']),
+                'quantity': int(item.get('quantity', 1)),
+                'unit_price': float(item.get('price', 0)),
+                'total_amount': float(item.get('price', 0)) * int(item.get('quantity', 1)),
+                'tax_amount': tax,
+                'shipping_amount': shipping_amount,
+                'payment_method': order.get('paymentMethod', 'Unknown'),
+                'order_status': order.get('status', 'Unknown'),
+                'is_paid': bool(order.get('isPaid', False)),
+                'is_delivered': bool(order.get('isDelivered', False)),
+            })
+            sale_id += 1
+
+    fact_sales = pd.DataFrame(fact_records)
+    for column in ('total_amount', 'tax_amount', 'shipping_amount'):
+        fact_sales[column] = fact_sales[column].round(2)
+    return fact_sales
+
+
+def check_allocation(etl):
+    """Exactness checks of the tax / shipping allocation on a transformed ETL"""
+    # Every order's lines add up to its taxPrice / shippingPrice to the cent
+    sums = etl.fact_sales.groupby('order_mongo_id')[['tax_amount', 'shipping_amount']].sum()
+    orders = etl.df_orders.set_index('_id').loc[sums.index]
+    for line_column, order_column in (('tax_amount', 'taxPrice'), ('shipping_amount', 'shippingPrice')):
+        np.testing.assert_array_equal(np.round(sums[line_column].to_numpy() * 100),
+                                      np.round(orders[order_column].to_numpy() * 100))
+
+    # Orders of free lines are split evenly (first lines get the odd cents), missing totals stay NaN
+    np.testing.assert_array_equal(
+        allocate_cents(np.array([0.05, np.nan]), np.array([0.0, 0.0, 0.0, 4.0]), np.array([0, 0, 0, 1])),
+        [0.02, 0.02, 0.01, np.nan])
+
+    # Shares are allocated before quarantine: the other lines keep theirs when one is rejected
+    order = etl.df_orders[etl.df_orders['orderItems'].map(len) > 1].head(1).copy()
+    items = [dict(item) for item in order['orderItems'].iloc[0]]
+    items[0]['product'] = 'unknown product'
+    order['orderItems'] = [items]
+    lookups = build_fact_lookups(etl.dim_customer, etl.dim_product, etl.dim_location)
+    kept = build_fact_sales(order, lookups)
+    loaded = etl.fact_sales[etl.fact_sales['order_mongo_id'] == order['_id'].iloc[0]]
+    for column in ('tax_amount', 'shipping_amount'):
+        np.testing.assert_array_equal(kept[column].to_numpy(), loaded[column].to_numpy()[1:])
+
+
+def timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+
+def run_benchmark(sizes, legacy_max_lines, partitions=(), partition_by='date'):
+    results = []
+    for n_lines in sizes:
+        print(f"\n▶ {n_lines:,} order lines")
+        etl = AppleStoreETL()
+        etl.df_users, etl.df_products, etl.df_orders = make_frames(n_lines)
+        etl.transform_dim_customer()
+        etl.transform_dim_product()
+        etl.transform_dim_time()
+        etl.transform_dim_location()
+
+        _, vectorized_s = timed(etl.transform_fact_sales)
+        check_allocation(etl)
+        print("   ✓ Tax / shipping allocation exact per order")
+        row = {'lines': n_lines, 'vectorized_s': round(vectorized_s, 3),
+               'quality_s': round(etl.quality.seconds, 3),
+               'quality_pct': round(100 * etl.quality.seconds / vectorized_s, 1), 'legacy_s': None, 'speedup': None}
+
+        if n_lines <= legacy_max_lines:
+            legacy, legacy_s = timed(legacy_fact_sales, etl)
+            pd.testing.assert_frame_equal(etl.fact_sales, legacy)
+            row['legacy_s'] = round(legacy_s, 3)
+            row['speedup'] = round(legacy_s / vectorized_s, 1)
+            print("   ✓ Output identical to row-by-row implementation")
+        for n_partitions in partitions:
+            etl.fact_partitions, etl.fact_partition_by = n_partitions, partition_by
+            single = etl.fact_sales
+            _, parallel_s = timed(etl.transform_fact_sales)
+            pd.testing.assert_frame_equal(etl.fact_sales, single)
+            row[f'p{n_partitions}_s'] = round(parallel_s, 3)
+            row[f'p{n_partitions}_scaling'] = round(vectorized_s / parallel_s, 2)
+            etl.fact_partitions = 1
+        results.append(row)
+
+    print("\n📊 FACT_SALES transform benchmark")
+    print(pd.DataFrame(results).to_string(index=False))
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10_000, 1_000_000, 10_000_000],
+                        help='Number of order lines per run')
+    parser.add_argument('--legacy-max-lines', type=int, default=10_000_000,
+                        help='Skip the row-by-row baseline above this many lines')
+    parser.add_argument('--partitions', type=int, nargs='*', default=[],
+                        help='Also time the multi-process build with these partition counts')
+    parser.add_argument('--partition-by', choices=['date', 'id'], default='date')
+    args = parser.parse_args()
+    run_benchmark(args.sizes, args.legacy_max_lines, args.partitions, args.partition_by)
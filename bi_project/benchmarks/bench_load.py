@@ -0,0 +1,89 @@
+"""
+============================================
+BENCHMARK: WAREHOUSE LOADING
+============================================
+
+Loads a synthetic star schema into a fresh SQLite warehouse twice: with the
+original DataFrame.to_sql(if_exists='append') calls and with the bulk loader
+selected for the dialect (bulk_loader.get_bulk_loader), and reports rows per
+second for every table.
+
+Usage:
+    python benchmarks/bench_load.py --sizes 100000 1000000
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import pandas as pd
+from sqlalchemy import create_engine
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import etl_pipeline  # noqa: E402
+from etl_pipeline import AppleStoreETL, DW_TABLES  # noqa: E402
+from bench_fact_sales import make_frames  # noqa: E402
+
+
+def build_star_schema(n_lines):
+    etl = AppleStoreETL()
+    etl.df_users, etl.df_products, etl.df_orders = make_frames(n_lines)
+    etl.transform_data()
+    return etl
+
+
+def load_with_to_sql(etl):
+    results = []
+    for table in DW_TABLES:
+        frame = getattr(etl, table)
+        start = time.perf_counter()
+        frame.to_sql(etl.target(table), etl.dw_engine, if_exists='append', index=False)
+        results.append((table, len(frame), time.perf_counter() - start))
+    return results
+
+
+def load_with_bulk_loader(etl):
+    etl.load_stats = []
+    for table in DW_TABLES:
+        etl.load_table(table, getattr(etl, table))
+    return [(s['table'], s['rows'], s['seconds']) for s in etl.load_stats]
+
+
+def run_benchmark(sizes):
+    rows = []
+    for n_lines in sizes:
+        print(f"\n▶ {n_lines:,} order lines")
+        etl = build_star_schema(n_lines)
+        for method, load in (('to_sql', load_with_to_sql), ('bulk', load_with_bulk_loader)):
+            with tempfile.TemporaryDirectory() as tmp:
+                etl_pipeline.DW_URI = f"sqlite:///{tmp}/bench.db"
+                etl.dw_engine, etl.bulk_loader = None, None
+                if method == 'bulk':
+                    etl.open_datawarehouse()
+                else:
+                    etl.dw_engine = create_engine(etl_pipeline.DW_URI)  # default settings
+                etl.create_dw_schema()
+                for table, count, seconds in load(etl):
+                    rows.append({'lines': n_lines, 'method': method, 'table': table, 'rows': count,
+                                 'seconds': round(seconds, 3),
+                                 'rows_per_s': round(count / seconds) if seconds else None})
+                etl.dw_engine.dispose()
+
+    report = pd.DataFrame(rows)
+    print("\n📊 Load throughput (SQLite)")
+    print(report.to_string(index=False))
+    totals = report.groupby(['lines', 'method'])[['rows', 'seconds']].sum()
+    totals['rows_per_s'] = (totals['rows'] / totals['seconds']).round()
+    print("\n" + totals.to_string())
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[100_000, 1_000_000],
+                        help='Number of order lines per run')
+    args = parser.parse_args()
+    run_benchmark(args.sizes)
@@ -0,0 +1,241 @@
+"""
+============================================
+SYNTHETIC DATA FOR BENCHMARKS
+============================================
+
+Generates users / products / orders shaped like the MongoDB collections the
+Apple Store back end writes (ObjectId references, nested orderItems and
+shippingAddress, createdAt / updatedAt dates), and an in-memory stand-in for
+pymongo's MongoClient so AppleStoreETL can extract them without a server.
+
+The stand-in implements only what the ETL uses: client.get_database(),
+db.<collection> / db[name], find(filter, projection, batch_size) with {} or
+{field: {'$gte': value}} filters, find_one(filter, projection, sort),
+count_documents(filter), aggregate() with the $match / $project stages and
+expressions of etl_pipeline.flat_orders_pipeline, and close().
+"""
+
+from datetime import datetime, timedelta
+from functools import partial
+
+import numpy as np
+from bson import ObjectId
+
+LOCATIONS = [
+    ('Sousse', 'Sousse', '4000'), ('Tunis', 'Tunis', '1000'), ('Sfax', 'Sfax', '3000'),
+    ('Monastir', 'Monastir', '5000'), ('Bizerte', 'Bizerte', '7000'), ('Nabeul', 'Nabeul', '8000'),
+    ('Hammamet', 'Nabeul', '8050'), ('La Marsa', 'Tunis', '2070'), ('Djerba', 'Médenine', '4180'),
+]
+# Share of orders shipped to each location (the coastal cities dominate)
+LOCATION_WEIGHTS = [0.22, 0.25, 0.12, 0.08, 0.06, 0.07, 0.06, 0.08, 0.06]
+STATUSES = ['Pending', 'Processing', 'Shipped', 'Delivered', 'Cancelled', 'Refunded']
+STATUS_WEIGHTS = [0.08, 0.10, 0.12, 0.60, 0.07, 0.03]
+PAYMENT_METHODS = ['Credit Card', 'PayPal', 'Cash on Delivery', 'Bank Transfer']
+# Category: (product line, price range in TND)
+CATEGORIES = {
+    'Smartphones': ('iPhone', 1899, 6499), 'Laptops': ('MacBook', 3499, 12999),
+    'Tablets': ('iPad', 1299, 5999), 'Watches': ('Apple Watch', 999, 3999),
+    'Audio': ('AirPods', 299, 2499), 'Accessories': ('Accessory', 49, 499),
+}
+
+
+def generate_documents(n_lines, n_customers=None, n_products=60, seed=42,
+                       start=datetime(2023, 1, 1), days=730):
+    """Users, products and orders adding up to n_lines order items
+
+    Orders hold 1-4 items (about 2.5 on average), spread over `days` days
+    from `start` with more orders on weekends and in December.
+    """
+    rng = np.random.default_rng(seed)
+    n_customers = n_customers or max(50, n_lines // 20)
+
+    users = [{'_id': ObjectId(), 'name': 'Admin', 'email': 'admin@applestoresousse.tn', 'isAdmin': True,
+              'createdAt': start, 'updatedAt': start}]
+    signups = start + timedelta(days=1) * rng.integers(0, days, n_customers)
+    for i, created in enumerate(signups):
+        users.append({'_id': ObjectId(), 'name': f'Customer {i}', 'email': f'customer{i}@example.tn',
+                      'isAdmin': False, 'createdAt': created, 'updatedAt': created})
+
+    categories = list(CATEGORIES)
+    products = []
+    for i in range(n_products):
+        category = categories[i % len(categories)]
+        product_line, low, high = CATEGORIES[category]
+        products.append({'_id': ObjectId(), 'name': f'{product_line} {i}', 'brand': 'Apple',
+                         'category': category, 'price': float(rng.integers(low, high)),
+                         'description': f'Synthetic {category.lower()} item',
+                         'countInStock': int(rng.integers(0, 80)), 'createdAt': start, 'updatedAt': start})
+
+    # Items per order, trimmed so the items add up to exactly n_lines
+    sizes = rng.choice([1, 2, 3, 4], size=n_lines // 2 + 1, p=[0.3, 0.3, 0.25, 0.15])
+    sizes = sizes[:np.searchsorted(np.cumsum(sizes), n_lines) + 1]
+    sizes[-1] -= sizes.sum() - n_lines
+    n_orders = len(sizes)
+
+    # Order dates: weekends and December weigh more
+    calendar = np.array([start + timedelta(days=d) for d in range(days)])
+    weights = np.array([1.4 if d.weekday() >= 5 else 1.0 for d in calendar])
+    weights *= np.array([1.8 if d.month == 12 else 1.0 for d in calendar])
+    order_days = rng.choice(days, size=n_orders, p=weights / weights.sum())
+    order_seconds = rng.integers(8 * 3600, 23 * 3600, n_orders)
+
+    # Popular products sell more (Zipf-like)
+    popularity = 1 / np.arange(1, n_products + 1)
+    line_products = rng.choice(n_products, size=n_lines, p=popularity / popularity.sum())
+    line_quantities = rng.choice([1, 2, 3], size=n_lines, p=[0.8, 0.15, 0.05])
+    order_customers = rng.integers(1, n_customers + 1, n_orders)
+    order_locations = rng.choice(len(LOCATIONS), size=n_orders, p=LOCATION_WEIGHTS)
+    order_statuses = rng.choice(len(STATUSES), size=n_orders, p=STATUS_WEIGHTS)
+    order_payments = rng.integers(0, len(PAYMENT_METHODS), n_orders)
+
+    orders = []
+    line = 0
+    for i, size in enumerate(sizes):
+        items = []
+        for product, quantity in zip(line_products[line:line + size], line_quantities[line:line + size]):
+            items.append({'product': products[product]['_id'], 'name': products[product]['name'],
+                          'price': products[product]['price'], 'quantity': int(quantity)})
+        line += size
+        subtotal = sum(item['price'] * item['quantity'] for item in items)
+        tax, shipping = round(subtotal * 0.19, 2), 0.0 if subtotal >= 1000 else 15.0
+        city, governorate, postal_code = LOCATIONS[order_locations[i]]
+        status = STATUSES[order_statuses[i]]
+        created = calendar[order_days[i]] + timedelta(seconds=int(order_seconds[i]))
+        orders.append({
+            '_id': ObjectId(),
+            'user': users[order_customers[i]]['_id'],
+            'orderItems': items,
+            'shippingAddress': {'address': f'{i % 200 + 1} Avenue Habib Bourguiba', 'city': city,
+                                'governorate': governorate, 'postalCode': postal_code, 'country': 'Tunisia'},
+            'paymentMethod': PAYMENT_METHODS[order_payments[i]],
+            'taxPrice': tax,
+            'shippingPrice': shipping,
+            'totalPrice': round(subtotal + tax + shipping, 2),
+            'status': status,
+            'isPaid': status in ('Processing', 'Shipped', 'Delivered'),
+            'isDelivered': status == 'Delivered',
+            'createdAt': created,
+            'updatedAt': created,
+        })
+    return {'users': users, 'products': products, 'orders': orders}
+
+
+# ============================================
+# IN-MEMORY MONGO STAND-IN
+# ============================================
+MISSING = object()
+
+
+def evaluate(expression, document, variables=None):
+    """Value of an aggregation expression ('$field.path', '$$variable.path', $toString, $isArray, $cond, $ifNull, $map)"""
+    if isinstance(expression, str) and expression.startswith('$'):
+        if expression.startswith('$$'):
+            name, *path = expression[2:].split('.')
+            value = variables[name]
+        else:
+            value, path = document, expression[1:].split('.')
+        for key in path:
+            value = value.get(key, MISSING) if isinstance(value, dict) else MISSING
+        return value
+    if not isinstance(expression, dict):
+        return expression
+    (operator, argument), = expression.items()
+    if operator == '$cond':
+        condition, then, otherwise = argument
+        return evaluate(then if evaluate(condition, document, variables) else otherwise, document, variables)
+    if operator == '$ifNull':
+        value, default = (evaluate(item, document, variables) for item in argument)
+        return default if value is MISSING or value is None else value
+    if operator == '$map':
+        values = (evaluate(argument['in'], document, {**(variables or {}), argument['as']: item})
+                  for item in evaluate(argument['input'], document, variables))
+        return [None if value is MISSING else value for value in values]
+    value = evaluate(argument, document, variables)
+    if operator == '$toString':
+        return None if value is MISSING or value is None else str(value)
+    if operator == '$isArray':
+        return isinstance(value, list)
+    raise NotImplementedError(operator)
+
+
+def project(document, spec):
+    """$project stage: included fields (1) and computed ones (missing values are left out)"""
+    projected = {'_id': document['_id']}
+    for field, expression in spec.items():
+        value = document.get(field, MISSING) if expression == 1 else evaluate(expression, document)
+        if value is not MISSING:
+            projected[field] = value
+    return projected
+
+
+class InMemoryCollection:
+    def __init__(self, documents):
+        self.documents = documents
+
+    def find(self, filter=None, projection=None, batch_size=None):
+        """Documents matching {} or {field: {'$gte': value}}, with top-level projection"""
+        documents = self.documents
+        for field, condition in (filter or {}).items():
+            value = condition['$gte']
+            documents = [doc for doc in documents if doc.get(field) is not None and doc[field] >= value]
+        if projection:
+            fields = {'_id'} | {field.split('.')[0] for field in projection}
+            documents = ({key: doc[key] for key in fields if key in doc} for doc in documents)
+        return iter(documents)
+
+    def find_one(self, filter=None, projection=None, sort=None):
+        """First matching document, or the one with the lowest / highest value of sort=[(field, 1 or -1)]"""
+        documents = list(self.find(filter))
+        if sort:
+            field, direction = sort[0]
+            documents = [doc for doc in documents if doc.get(field) is not None]
+            if documents:
+                documents = [(max if direction < 0 else min)(documents, key=lambda doc: doc[field])]
+        if not documents:
+            return None
+        return next(InMemoryCollection(documents[:1]).find(None, projection))
+
+    def count_documents(self, filter):
+        return sum(1 for _ in self.find(filter))
+
+    def aggregate(self, pipeline, **kwargs):
+        documents = iter(self.documents)
+        for stage in pipeline:
+            (operator, spec), = stage.items()
+            if operator == '$match':
+                documents = InMemoryCollection(list(documents)).find(spec)
+            elif operator == '$project':
+                documents = map(partial(project, spec=spec), documents)
+            else:
+                raise NotImplementedError(operator)
+        return documents
+
+
+class InMemoryDatabase:
+    def __init__(self, name, collections):
+        self.name = name
+        self.collections = {name: InMemoryCollection(docs) for name, docs in collections.items()}
+
+    def __getitem__(self, name):
+        return self.collections.setdefault(name, InMemoryCollection([]))
+
+    def __getattr__(self, name):
+        if name.startswith('_') or name in ('name', 'collections'):
+            raise AttributeError(name)
+        return self[name]
+
+
+class InMemoryMongoClient:
+    """Drop-in for MongoClient(uri) serving generated collections"""
+
+    def __init__(self, collections, name='applestoresousse'):
+        self.database = InMemoryDatabase(name, collections)
+
+    def __call__(self, *args, **kwargs):
+        return self  # used in place of the MongoClient class
+
+    def get_database(self, name=None):
+        return self.database
+
+    def close(self):
+        pass
@@ -0,0 +1,186 @@
+"""
+============================================
+BULK LOADERS FOR THE DATA WAREHOUSE
+Data Analytics & Business Intelligence Project
+============================================
+
+Pluggable bulk-load layer used by AppleStoreETL, chosen from the DW_URI dialect:
+
+- SQLite:      executemany() of prepared rows inside one transaction, on
+               connections tuned for bulk writes (see SQLITE_PRAGMAS)
+- PostgreSQL:  COPY ... FROM STDIN (psycopg2 or psycopg 3)
+- DuckDB:      INSERT ... SELECT over the DataFrame itself, which DuckDB scans
+               in place (duckdb-engine; no row conversion)
+- Others:      pandas to_sql with multi-row INSERT statements
+
+Every load returns a stats dict with the rows per second achieved.
+"""
+
+import io
+import time
+from datetime import date, datetime
+
+from sqlalchemy import event
+
+# Rows converted and sent per executemany() / COPY round trip
+LOAD_CHUNK_ROWS = 100_000
+
+# Connection settings for bulk loading into SQLite. WAL lets dashboards keep
+# reading the last committed tables while a load writes. The warehouse holds
+# state MongoDB cannot rebuild (dimension history, location ids, watermarks,
+# resume token), so commits must survive a power loss: synchronous=FULL syncs the
+# WAL on every commit (NORMAL only at checkpoints, which can lose recent commits).
+# Loads commit in a few large transactions, so the extra fsyncs stay cheap.
+SQLITE_PRAGMAS = {
+    'synchronous': 'FULL',
+    'journal_mode': 'WAL',
+    'temp_store': 'MEMORY',
+    'cache_size': '-262144',  # 256 MB page cache
+}
+
+
+def load_stats(table, rows, seconds):
+    """Timing report of one table load"""
+    return {
+        'table': table,
+        'rows': rows,
+        'seconds': seconds,
+        'rows_per_second': rows / seconds if seconds > 0 else 0.0,
+    }
+
+
+def column_values(series):
+    """Python values of a column, as accepted by DB-API drivers (None for missing)"""
+    kind = series.dtype.kind
+    if kind in 'iu':
+        return series.tolist()
+    if kind == 'b':
+        return series.astype('int64').tolist()
+    if kind == 'f' and not series.isna().any():
+        return series.tolist()
+    if kind == 'M':
+        formatted = series.dt.strftime('%Y-%m-%d %H:%M:%S.%f')
+        return formatted.astype(object).where(series.notna(), None).tolist()
+
+    values = series.astype(object).where(series.notna(), None).tolist()
+    if any(isinstance(value, (date, datetime)) for value in values[:1000]):
+        values = [value.isoformat() if isinstance(value, date) and not isinstance(value, datetime)
+                  else value.strftime('%Y-%m-%d %H:%M:%S.%f') if isinstance(value, datetime) else value
+                  for value in values]
+    return values
+
+
+def frame_rows(frame, chunk_rows=LOAD_CHUNK_ROWS):
+    """Yield the frame as lists of row tuples, chunk_rows at a time"""
+    for start in range(0, len(frame), chunk_rows):
+        chunk = frame.iloc[start:start + chunk_rows]
+        yield list(zip(*(column_values(chunk[column]) for column in chunk.columns)))
+
+
+class BulkLoader:
+    """Default backend: pandas to_sql with multi-row INSERT statements"""
+
+    name = 'to_sql (multi-row INSERT)'
+    parallel_writes = True
+    # Schema features AppleStoreETL creates on this engine
+    foreign_keys = True
+    secondary_indexes = True
+
+    def __init__(self, engine):
+        self.engine = engine
+
+    def load(self, table, frame, conn=None):
+        """Append a DataFrame to a table (in its own transaction unless conn is given)"""
+        start = time.perf_counter()
+        if conn is None:
+            with self.engine.begin() as conn:
+                self.insert(conn, table, frame)
+        else:
+            self.insert(conn, table, frame)
+        return load_stats(table, len(frame), time.perf_counter() - start)
+
+    def insert(self, conn, table, frame):
+        frame.to_sql(table, conn, if_exists='append', index=False, method='multi', chunksize=1000)
+
+
+class SQLiteBulkLoader(BulkLoader):
+    """SQLite: executemany() inside a single transaction on tuned connections"""
+
+    name = 'SQLite executemany'
+    parallel_writes = False  # one writer at a time
+
+    def __init__(self, engine):
+        super().__init__(engine)
+        event.listen(engine, 'connect', self.set_pragmas)
+        engine.dispose()  # pooled connections pick up the pragmas on reconnect
+
+    @staticmethod
+    def set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for pragma, value in SQLITE_PRAGMAS.items():
+            cursor.execute(f"PRAGMA {pragma} = {value}")
+        cursor.close()
+
+    def insert(self, conn, table, frame):
+        columns = ', '.join(frame.columns)
+        placeholders = ', '.join('?' for _ in frame.columns)
+        statement = f"INSERT INTO {table} ({columns}) VALUES ({placeholders})"
+        for rows in frame_rows(frame):
+            conn.exec_driver_sql(statement, rows)
+
+
+class PostgresCopyLoader(BulkLoader):
+    """PostgreSQL: COPY FROM STDIN in CSV format"""
+
+    name = 'PostgreSQL COPY'
+
+    def insert(self, conn, table, frame):
+        statement = (f"COPY {table} ({', '.join(frame.columns)}) "
+                     f"FROM STDIN WITH (FORMAT csv, NULL '\\N')")
+        cursor = conn.connection.driver_connection.cursor()
+        try:
+            for start in range(0, len(frame), LOAD_CHUNK_ROWS):
+                buffer = io.StringIO()
+                frame.iloc[start:start + LOAD_CHUNK_ROWS].to_csv(
+                    buffer, index=False, header=False, na_rep='\\N', date_format='%Y-%m-%d %H:%M:%S.%f')
+                buffer.seek(0)
+                if hasattr(cursor, 'copy_expert'):  # psycopg2
+                    cursor.copy_expert(statement, buffer)
+                else:  # psycopg 3
+                    with cursor.copy(statement) as copy:
+                        copy.write(buffer.getvalue())
+        finally:
+            cursor.close()
+
+
+class DuckDBBulkLoader(BulkLoader):
+    """DuckDB: INSERT ... SELECT from the DataFrame registered as a view"""
+
+    name = 'DuckDB DataFrame scan'
+    # DuckDB cannot rename a table that foreign keys or indexes depend on (the
+    # shadow-table swap), and its column store prunes scans with min/max zone
+    # maps, so the warehouse tables keep only their primary keys
+    foreign_keys = False
+    secondary_indexes = False
+
+    def insert(self, conn, table, frame):
+        columns = ', '.join(frame.columns)
+        view = f"{table}__frame"
+        duckdb_connection = conn.connection.driver_connection
+        duckdb_connection.register(view, frame)
+        try:
+            conn.exec_driver_sql(f"INSERT INTO {table} ({columns}) SELECT {columns} FROM {view}")
+        finally:
+            duckdb_connection.unregister(view)
+
+
+BULK_LOADERS = {
+    'sqlite': SQLiteBulkLoader,
+    'postgresql': PostgresCopyLoader,
+    'duckdb': DuckDBBulkLoader,
+}
+
+
+def get_bulk_loader(engine):
+    """Bulk loader matching the engine's SQL dialect"""
+    return BULK_LOADERS.get(engine.dialect.name, BulkLoader)(engine)
@@ -0,0 +1,167 @@
+"""
+============================================
+COLUMNAR EXPORT (PARQUET / ARROW IPC)
+Data Analytics & Business Intelligence Project
+============================================
+
+Typed, compressed alternative to the CSV export used by AppleStoreETL:
+
+- every table is written as a dataset directory (dw_export/parquet/<table>/)
+  of Parquet or Arrow IPC files carrying their schema, so dates, booleans and
+  integers come back with their types
+- fact_sales can be partitioned by year and month of its sale date
+  (hive layout: fact_sales/year=2024/month=3/part-....parquet)
+- append=True adds new files next to the existing ones instead of replacing
+  the dataset, cast to the schema already on disk
+- replace_partition rewrites a single year/month partition (incremental runs)
+
+Needs pyarrow (pip install pyarrow), except copy_to_parquet: DuckDB warehouses
+write the same Parquet datasets straight from their tables with COPY ... TO.
+"""
+
+import os
+import shutil
+import uuid
+
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+except ImportError:  # optional dependency, only needed for Parquet/Arrow exports
+    pa = ds = None
+
+COLUMNAR_FORMATS = {'parquet': 'parquet', 'arrow': 'arrow'}
+COMPRESSION = 'zstd'
+
+# Columns holding calendar dates (stored as date32, not strings or timestamps)
+DATE_COLUMNS = {'registration_date', 'full_date'}
+
+# Partition columns added to fact_sales from its dim_time row
+FACT_PARTITION_COLUMNS = ['year', 'month']
+
+
+def require_pyarrow():
+    if pa is None:
+        raise ImportError("Parquet/Arrow export needs pyarrow: pip install pyarrow")
+
+
+def file_format(fmt):
+    """pyarrow dataset format and write options for 'parquet' or 'arrow'"""
+    if fmt == 'parquet':
+        format_ = ds.ParquetFileFormat()
+    elif fmt == 'arrow':
+        format_ = ds.IpcFileFormat()
+    else:
+        raise ValueError(f"Unknown columnar format: {fmt!r} (use 'parquet' or 'arrow')")
+    return format_, format_.make_write_options(compression=COMPRESSION)
+
+
+def dataset_path(output_dir, fmt, table):
+    return os.path.join(output_dir, fmt, table)
+
+
+def with_partition_columns(fact_sales, dim_time):
+    """fact_sales plus the year / month of its sale date (partition keys)"""
+    calendar = dim_time.set_index('time_id')
+    fact = fact_sales.copy()
+    for column in FACT_PARTITION_COLUMNS:
+        fact[column] = fact['time_id'].map(calendar[column]).astype('int64')
+    return fact
+
+
+def plain_dtypes(frame):
+    """The frame with categoricals decoded and integers as int64
+
+    Exports get the same layout whether or not the ETL holds compact dtypes in memory.
+    """
+    dtypes = {}
+    for column, dtype in frame.dtypes.items():
+        if isinstance(dtype, pd.CategoricalDtype):
+            dtypes[column] = dtype.categories.dtype
+        elif dtype.kind == 'i' and dtype != 'int64':
+            dtypes[column] = 'int64'
+    return frame.astype(dtypes) if dtypes else frame
+
+
+def to_arrow(frame, schema=None):
+    """Arrow table of a warehouse frame (dates as date32, cast to schema if given)"""
+    frame = plain_dtypes(frame).copy()
+    for column in DATE_COLUMNS.intersection(frame.columns):
+        frame[column] = pd.to_datetime(frame[column]).dt.date
+    table = pa.Table.from_pandas(frame, preserve_index=False)
+    return table.select(schema.names).cast(schema) if schema is not None else table
+
+
+def write_table(frame, path, fmt='parquet', partition_cols=None, append=False):
+    """Write a frame as a Parquet/Arrow dataset directory (replacing it unless append=True)"""
+    require_pyarrow()
+    format_, options = file_format(fmt)
+
+    schema = None
+    if os.path.isdir(path):
+        if append:
+            schema = ds.dataset(path, format=format_, partitioning='hive').schema
+        else:
+            shutil.rmtree(path)
+    table = to_arrow(frame, schema)
+
+    partitioning = None
+    if partition_cols:
+        partitioning = ds.partitioning(pa.schema([table.schema.field(c) for c in partition_cols]),
+                                       flavor='hive')
+    ds.write_dataset(table, path, format=format_, file_options=options, partitioning=partitioning,
+                     basename_template=f'part-{uuid.uuid4().hex}-{{i}}.{COLUMNAR_FORMATS[fmt]}',
+                     existing_data_behavior='overwrite_or_ignore')
+    return path
+
+
+def replace_partition(frame, path, fmt, partition):
+    """Replace the files of one hive partition (e.g. {'year': 2024, 'month': 3}) with the rows of frame
+
+    The new files are written before the old ones are removed, so readers never
+    see the month missing; an empty frame just removes it.
+    """
+    require_pyarrow()
+    partition_dir = os.path.join(path, *(f'{column}={value}' for column, value in partition.items()))
+    old_files = [os.path.join(partition_dir, name) for name in os.listdir(partition_dir)] \
+        if os.path.isdir(partition_dir) else []
+    if len(frame):
+        write_table(frame.assign(**partition), path, fmt, list(partition), append=True)
+    for old_file in old_files:
+        os.remove(old_file)
+    # Drop the directories left empty (month, then year)
+    while partition_dir != path and os.path.isdir(partition_dir) and not os.listdir(partition_dir):
+        os.rmdir(partition_dir)
+        partition_dir = os.path.dirname(partition_dir)
+
+
+def copy_to_parquet(conn, query, path, partition_cols=None):
+    """Write the result of a DuckDB query as a Parquet dataset with COPY ... TO (replacing it); rows written"""
+    if os.path.isdir(path):
+        shutil.rmtree(path)
+    basename = f'part-{uuid.uuid4().hex}'
+    options = f"FORMAT parquet, COMPRESSION {COMPRESSION}"
+    if partition_cols:
+        target = path
+        options += f", PARTITION_BY ({', '.join(partition_cols)}), FILENAME_PATTERN '{basename}-{{i}}'"
+    else:
+        os.makedirs(path)
+        target = os.path.join(path, f'{basename}-0.parquet')
+    target = target.replace("'", "''")
+    return conn.exec_driver_sql(f"COPY ({query}) TO '{target}' ({options})").scalar()
+
+
+def read_table(path, fmt='parquet'):
+    """Read a dataset written by write_table back into a DataFrame"""
+    require_pyarrow()
+    format_, _ = file_format(fmt)
+    return ds.dataset(path, format=format_, partitioning='hive').to_table().to_pandas()
+
+
+def dataset_size(path):
+    """Size on disk of a dataset directory (or file) in bytes"""
+    if os.path.isfile(path):
+        return os.path.getsize(path)
+    return sum(os.path.getsize(os.path.join(root, name))
+               for root, _, names in os.walk(path) for name in names)
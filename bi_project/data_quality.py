@@ -0,0 +1,157 @@
+"""
+============================================
+DATA QUALITY RULES
+Data Analytics & Business Intelligence Project
+============================================
+
+Declarative checks AppleStoreETL runs on FACT_SALES before it is loaded:
+
+- every rule is an entry of FACT_RULES: the level it checks (each order line,
+  or each order as a whole), a check (not_null, range, sum_equals) with its
+  parameters, and an action
+- a check returns the mask of the failing rows, computed over whole columns
+  (no per-row Python), so validating millions of lines costs a few numpy passes
+- lines failing a 'reject' rule are left out of FACT_SALES and written to the
+  etl_quarantine table with the names of the rules they broke; order rules
+  reject every line of the order; 'warn' rules are only counted
+- a QualityReport collects the per-rule counts and the rejected lines of a run
+  (also across chunks and worker processes)
+"""
+
+import os
+
+import numpy as np
+import pandas as pd
+
+# Bounds of the range checks (TND / units per order line)
+MAX_UNIT_PRICE = float(os.getenv('QUALITY_MAX_UNIT_PRICE', '100000'))
+MAX_QUANTITY = int(os.getenv('QUALITY_MAX_QUANTITY', '1000'))
+# Accepted gap between the order totalPrice and its items + tax + shipping (TND)
+TOTAL_TOLERANCE = float(os.getenv('QUALITY_TOTAL_TOLERANCE', '0.01'))
+# Rules that only count their failures instead of quarantining lines,
+# e.g. QUALITY_WARN_RULES=order_total_mismatch
+QUALITY_WARN_RULES = [name for name in os.getenv('QUALITY_WARN_RULES', '').split(',') if name]
+
+
+def rule(level, check, columns, action='reject', **params):
+    """Rule definition: rows of a level ('line' or 'order') checked by CHECKS[check] on columns"""
+    return {'level': level, 'check': check, 'columns': columns, 'action': action, **params}
+
+
+# Line columns: customer_id / product_id / time_id (NaN when the lookup found
+# nothing), quantity, unit_price. Order columns: items_total (sum of the line
+# amounts), tax_price, shipping_price, total_price (NaN when the order has none).
+FACT_RULES = {
+    'unknown_customer': rule('line', 'not_null', ['customer_id']),
+    'unknown_product': rule('line', 'not_null', ['product_id']),
+    'missing_order_date': rule('line', 'not_null', ['time_id']),
+    'missing_quantity': rule('line', 'not_null', ['quantity']),
+    'missing_price': rule('line', 'not_null', ['unit_price']),
+    'quantity_range': rule('line', 'range', ['quantity'], min=1, max=MAX_QUANTITY),
+    'price_range': rule('line', 'range', ['unit_price'], min=0, max=MAX_UNIT_PRICE),
+    'order_total_mismatch': rule('order', 'sum_equals', ['items_total', 'tax_price', 'shipping_price'],
+                                 target='total_price', tolerance=TOTAL_TOLERANCE),
+}
+for name in QUALITY_WARN_RULES:
+    if name not in FACT_RULES:
+        raise ValueError(f"Unknown rule in QUALITY_WARN_RULES: {name!r} (rules: {', '.join(FACT_RULES)})")
+    FACT_RULES[name]['action'] = 'warn'
+
+# Columns of the etl_quarantine table (plus quarantined_at, set when it is written)
+QUARANTINE_COLUMNS = ['rules', 'order_mongo_id', 'customer_mongo_id', 'product_mongo_id', 'order_date',
+                      'quantity', 'unit_price', 'order_total']
+
+
+# ============================================
+# CHECKS
+# ============================================
+def column_values(frame, column):
+    return pd.to_numeric(frame[column], errors='coerce').to_numpy(dtype=float, na_value=np.nan)
+
+
+def check_not_null(frame, spec):
+    return np.logical_or.reduce([frame[column].isna().to_numpy() for column in spec['columns']])
+
+
+def check_range(frame, spec):
+    """Values outside [min, max] (missing values pass: not_null rules catch them)"""
+    failing = np.zeros(len(frame), dtype=bool)
+    for column in spec['columns']:
+        values = column_values(frame, column)
+        failing |= (values < spec['min']) | (values > spec['max'])
+    return failing
+
+
+def check_sum_equals(frame, spec):
+    """Rows whose columns do not add up to the target (rows without a target pass)"""
+    total = np.nansum([column_values(frame, column) for column in spec['columns']], axis=0)
+    return np.abs(total - column_values(frame, spec['target'])) > spec['tolerance'] + 1e-9
+
+
+CHECKS = {
+    'not_null': check_not_null,
+    'range': check_range,
+    'sum_equals': check_sum_equals,
+}
+
+
+def rule_failures(frame, level, rules=FACT_RULES):
+    """{rule name: mask of the failing rows} for the rules of one level"""
+    return {name: CHECKS[spec['check']](frame, spec) for name, spec in rules.items() if spec['level'] == level}
+
+
+def rejected_rows(failures, n_rows, rules=FACT_RULES):
+    """(mask of the rows failing a 'reject' rule, comma-separated rule names of those rows)"""
+    rejected = np.zeros(n_rows, dtype=bool)
+    rejecting = [name for name in rules if name in failures and rules[name]['action'] == 'reject']
+    for name in rejecting:
+        rejected |= failures[name]
+    reasons = np.full(int(rejected.sum()), '', dtype=object)
+    for name in rejecting:
+        reasons = np.where(failures[name][rejected], reasons + name + ',', reasons)
+    return rejected, np.array([reason[:-1] for reason in reasons], dtype=object)
+
+
+# ============================================
+# REPORT
+# ============================================
+class QualityReport:
+    """Per-rule failure counts and rejected lines of one run"""
+
+    def __init__(self, rules=FACT_RULES):
+        self.rules = rules
+        self.checked = 0
+        self.failed = dict.fromkeys(rules, 0)
+        self.rejected = []
+        self.seconds = 0.0
+
+    def add(self, checked, failures, rejects, seconds):
+        self.checked += checked
+        for name, mask in failures.items():
+            self.failed[name] += int(mask.sum())
+        if len(rejects):
+            self.rejected.append(rejects)
+        self.seconds += seconds
+
+    def merge(self, other):
+        self.add(other.checked, {}, [], other.seconds)
+        for name, count in other.failed.items():
+            self.failed[name] += count
+        self.rejected.extend(other.rejected)
+
+    def quarantine(self):
+        """Rejected lines as etl_quarantine rows"""
+        if not self.rejected:
+            return pd.DataFrame({column: pd.Series(dtype=object) for column in QUARANTINE_COLUMNS})
+        return pd.concat(self.rejected, ignore_index=True)[QUARANTINE_COLUMNS]
+
+    def rows(self):
+        """(rule, action, failing lines) of every rule"""
+        return [(name, self.rules[name]['action'], count) for name, count in self.failed.items()]
+
+    def print_summary(self):
+        rejected = sum(len(frame) for frame in self.rejected)
+        print(f"   🧪 Quality checks on {self.checked} lines ({self.seconds:.2f}s): {rejected} quarantined")
+        for name, action, count in self.rows():
+            if count:
+                print(f"      • {name}: {count} lines ({'quarantined' if action == 'reject' else 'warning'})")
@@ -10,6 +10,9 @@
 -- ============================================
 -- DROP EXISTING TABLES (if any)
 -- ============================================
+DROP TABLE IF EXISTS agg_daily_product_sales CASCADE;
+DROP TABLE IF EXISTS agg_monthly_category_location_sales CASCADE;
+DROP TABLE IF EXISTS agg_customer_lifetime_value CASCADE;
 DROP TABLE IF EXISTS fact_sales CASCADE;
 DROP TABLE IF EXISTS dim_time CASCADE;
 DROP TABLE IF EXISTS dim_product CASCADE;
@@ -26,12 +29,19 @@ DROP TABLE IF EXISTS dim_location CASCADE;
 -- --------------------------------------------
 CREATE TABLE dim_customer (
     customer_id         INTEGER PRIMARY KEY,
-    mongo_id            VARCHAR(50) UNIQUE,
+    mongo_id            VARCHAR(50) NOT NULL,
     customer_name       VARCHAR(100) NOT NULL,
     email               VARCHAR(100),
     registration_date   DATE,
     is_active           BOOLEAN DEFAULT TRUE,
     
+    -- SCD type 2 versioning
+    row_hash            BIGINT,
+    scd_hash            BIGINT,
+    valid_from          TIMESTAMP NOT NULL,
+    valid_to            TIMESTAMP,
+    is_current          BOOLEAN DEFAULT TRUE,
+    
     -- Metadata
     created_at          TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     updated_at          TIMESTAMP DEFAULT CURRENT_TIMESTAMP
@@ -39,11 +49,14 @@ CREATE TABLE dim_customer (
 
 -- Index for faster lookups
 CREATE INDEX idx_customer_email ON dim_customer(email);
-CREATE INDEX idx_customer_mongo_id ON dim_customer(mongo_id);
+CREATE INDEX idx_customer_mongo_id ON dim_customer(mongo_id, is_current);
 
 COMMENT ON TABLE dim_customer IS 'Customer dimension table containing customer information';
-COMMENT ON COLUMN dim_customer.customer_id IS 'Surrogate key for customer dimension';
-COMMENT ON COLUMN dim_customer.mongo_id IS 'Original MongoDB ObjectId reference';
+COMMENT ON COLUMN dim_customer.customer_id IS 'Surrogate key of one version of a customer';
+COMMENT ON COLUMN dim_customer.mongo_id IS 'Original MongoDB ObjectId reference (shared by all versions)';
+COMMENT ON COLUMN dim_customer.row_hash IS 'Hash of all attributes (unchanged customers are skipped)';
+COMMENT ON COLUMN dim_customer.scd_hash IS 'Hash of the versioned attributes (customer_name, email)';
+COMMENT ON COLUMN dim_customer.valid_to IS 'End of the version (NULL while current)';
 
 
 -- --------------------------------------------
@@ -52,7 +65,7 @@ COMMENT ON COLUMN dim_customer.mongo_id IS 'Original MongoDB ObjectId reference'
 -- --------------------------------------------
 CREATE TABLE dim_product (
     product_id          INTEGER PRIMARY KEY,
-    mongo_id            VARCHAR(50) UNIQUE,
+    mongo_id            VARCHAR(50) NOT NULL,
     product_name        VARCHAR(200) NOT NULL,
     brand               VARCHAR(50) DEFAULT 'Apple',
     category            VARCHAR(50),
@@ -60,6 +73,13 @@ CREATE TABLE dim_product (
     description         TEXT,
     stock_quantity      INTEGER DEFAULT 0,
     
+    -- SCD type 2 versioning
+    row_hash            BIGINT,
+    scd_hash            BIGINT,
+    valid_from          TIMESTAMP NOT NULL,
+    valid_to            TIMESTAMP,
+    is_current          BOOLEAN DEFAULT TRUE,
+    
     -- Metadata
     created_at          TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     updated_at          TIMESTAMP DEFAULT CURRENT_TIMESTAMP
@@ -68,10 +88,12 @@ CREATE TABLE dim_product (
 -- Indexes for faster lookups and filtering
 CREATE INDEX idx_product_category ON dim_product(category);
 CREATE INDEX idx_product_brand ON dim_product(brand);
-CREATE INDEX idx_product_mongo_id ON dim_product(mongo_id);
+CREATE INDEX idx_product_mongo_id ON dim_product(mongo_id, is_current);
 
 COMMENT ON TABLE dim_product IS 'Product dimension table containing product catalog information';
-COMMENT ON COLUMN dim_product.product_id IS 'Surrogate key for product dimension';
+COMMENT ON COLUMN dim_product.product_id IS 'Surrogate key of one version of a product';
+COMMENT ON COLUMN dim_product.current_price IS 'Price while this version was current (a change adds a version)';
+COMMENT ON COLUMN dim_product.scd_hash IS 'Hash of the versioned attributes (name, brand, category, price)';
 COMMENT ON COLUMN dim_product.category IS 'Product category (Smartphones, Laptops, Tablets, etc.)';
 
 
@@ -179,6 +201,8 @@ CREATE TABLE fact_sales (
 );
 
 -- Indexes for common query patterns
+-- (etl_pipeline.py builds its tables as shadow copies and creates the indexes
+-- of DW_INDEXES after the bulk insert, as idx_<table>_<name>[_2])
 CREATE INDEX idx_fact_time ON fact_sales(time_id);
 CREATE INDEX idx_fact_product ON fact_sales(product_id);
 CREATE INDEX idx_fact_customer ON fact_sales(customer_id);
@@ -196,6 +220,48 @@ COMMENT ON COLUMN fact_sales.sale_id IS 'Surrogate key for fact table';
 COMMENT ON COLUMN fact_sales.total_amount IS 'quantity * unit_price';
 
 
+-- ============================================
+-- AGGREGATE TABLES (ROLLUPS)
+-- ============================================
+-- Maintained by the ETL after every load (etl_pipeline.AGGREGATE_TABLES):
+-- rebuilt on full loads, only the affected groups recomputed on incremental
+-- runs. Dashboard queries read these instead of scanning fact_sales.
+
+-- Daily sales per product (grain: day x product)
+CREATE TABLE agg_daily_product_sales (
+    time_id             INTEGER NOT NULL,
+    product_id          INTEGER NOT NULL,
+    order_lines         INTEGER,
+    units_sold          INTEGER,
+    revenue             DECIMAL(14,2),
+    paid_revenue        DECIMAL(14,2),
+    PRIMARY KEY (time_id, product_id)
+);
+
+-- Monthly sales per category and location (grain: month x category x location)
+CREATE TABLE agg_monthly_category_location_sales (
+    year                INTEGER NOT NULL,
+    month               INTEGER NOT NULL,
+    category            VARCHAR(50),
+    location_id         INTEGER NOT NULL,
+    order_count         INTEGER,
+    units_sold          INTEGER,
+    revenue             DECIMAL(14,2),
+    paid_revenue        DECIMAL(14,2)
+);
+
+-- Customer lifetime value (grain: customer, keyed by its current version)
+CREATE TABLE agg_customer_lifetime_value (
+    customer_id         INTEGER PRIMARY KEY,
+    order_count         INTEGER,
+    units_bought        INTEGER,
+    lifetime_revenue    DECIMAL(14,2),
+    paid_revenue        DECIMAL(14,2),
+    first_order_date    DATE,
+    last_order_date     DATE
+);
+
+
 -- ============================================
 -- SAMPLE ANALYTICAL QUERIES
 -- ============================================
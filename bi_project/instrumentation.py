@@ -0,0 +1,303 @@
+"""
+============================================
+PIPELINE INSTRUMENTATION
+Data Analytics & Business Intelligence Project
+============================================
+
+Structured metrics for every extract / transform / load / validate / export
+step of AppleStoreETL:
+
+- @instrumented(phase, rows_in=..., rows_out=...) wraps an ETL method and
+  records its duration, input / output row counts, RSS before / after and
+  status (ok / error)
+- records are appended to a JSON lines file as each step finishes
+  (ETL_METRICS_JSONL) and, when the run ends, written as Prometheus text
+  exposition (ETL_METRICS_PROM, e.g. for node_exporter's textfile collector)
+- ETL_PROFILE=cprofile saves a .prof file per step (open with snakeviz or
+  pstats); ETL_PROFILE=sampling samples the step's thread stack every few
+  milliseconds and saves collapsed stacks (flamegraph.pl / speedscope)
+
+Only the outermost non-run step of each thread is profiled: extract_all in
+the main thread, and each DAG step in its worker thread.
+RSS is process-wide, so memory deltas of concurrent steps overlap.
+"""
+
+import cProfile
+import functools
+import io
+import json
+import os
+import pstats
+import sys
+import threading
+import time
+from collections import Counter, deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime
+
+PROFILERS = ('cprofile', 'sampling')
+PROFILE_TOP = 10
+# Records kept in memory (the long-running realtime loader would otherwise grow forever)
+MAX_RECORDS = 10_000
+
+# Steps currently running in this context, outermost first (copied into DAG worker threads)
+ACTIVE_STEPS = ContextVar('active_steps', default=())
+
+
+def current_rss_mb():
+    """Resident memory of the current process in MB (None if it cannot be measured)"""
+    try:
+        import psutil
+        return psutil.Process().memory_info().rss / 1024 ** 2
+    except ImportError:
+        pass
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / 1024 ** 2
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+def rows_of(*attributes):
+    """Row counter for @instrumented: total length of the given ETL DataFrames (None if none is set)"""
+    def count(etl, *args, **kwargs):
+        frames = [getattr(etl, attribute, None) for attribute in attributes]
+        frames = [frame for frame in frames if frame is not None]
+        return sum(len(frame) for frame in frames) if frames else None
+    return count
+
+
+def count_rows(counter, etl, args, kwargs):
+    """Evaluate a rows_in / rows_out counter, None if the data is not there"""
+    if counter is None:
+        return None
+    try:
+        rows = counter(etl, *args, **kwargs)
+    except (AttributeError, TypeError, KeyError):
+        return None
+    return None if rows is None else int(rows)
+
+
+def instrumented(phase, rows_in=None, rows_out=None, name=None):
+    """Record an AppleStoreETL method as a pipeline step of the given phase
+
+    rows_in / rows_out: callables (etl, *args, **kwargs) -> row count, evaluated
+    before and after the call; name: callable giving the step name (default:
+    the method name).
+    """
+    def decorate(method):
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            metrics = getattr(self, 'metrics', None)
+            if metrics is None:
+                return method(self, *args, **kwargs)
+            step = name(self, *args, **kwargs) if name else method.__name__
+            with metrics.step(step, phase, count_rows(rows_in, self, args, kwargs)) as record:
+                result = method(self, *args, **kwargs)
+                record['rows_out'] = count_rows(rows_out, self, args, kwargs)
+            return result
+        return wrapper
+    return decorate
+
+
+# ============================================
+# PROFILERS
+# ============================================
+class StepCProfile:
+    """cProfile of one step, saved as <dir>/<step>.prof"""
+
+    def __init__(self):
+        self.profile = cProfile.Profile()
+
+    def start(self):
+        self.profile.enable()
+
+    def stop(self, path):
+        self.profile.disable()
+        self.profile.dump_stats(path + '.prof')
+        stream = io.StringIO()
+        stats = pstats.Stats(self.profile, stream=stream)
+        top = sorted(stats.stats.items(), key=lambda item: item[1][3], reverse=True)[:PROFILE_TOP]
+        return [{'function': f"{os.path.basename(file)}:{line}({func})", 'cumulative_s': round(cum, 4)}
+                for (file, line, func), (_, _, _, cum, _) in top]
+
+
+class StepSampler:
+    """Samples the stack of the step's thread; saved as collapsed stacks in <dir>/<step>.collapsed"""
+
+    def __init__(self, interval=0.005):
+        self.interval = interval
+        self.thread_id = threading.get_ident()
+        self.stacks = Counter()
+        self.done = threading.Event()
+
+    def sample(self):
+        while not self.done.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+                frame = frame.f_back
+            if stack:
+                self.stacks[';'.join(reversed(stack))] += 1
+
+    def start(self):
+        self.thread = threading.Thread(target=self.sample, name='step-sampler', daemon=True)
+        self.thread.start()
+
+    def stop(self, path):
+        self.done.set()
+        self.thread.join()
+        with open(path + '.collapsed', 'w') as f:
+            for stack, samples in self.stacks.most_common():
+                f.write(f"{stack} {samples}\n")
+        # Self time: samples where the function is the innermost frame
+        leaves = Counter()
+        for stack, samples in self.stacks.items():
+            leaves[stack.rsplit(';', 1)[-1]] += samples
+        total = sum(leaves.values()) or 1
+        return [{'function': function, 'samples': samples, 'share': round(samples / total, 3)}
+                for function, samples in leaves.most_common(PROFILE_TOP)]
+
+
+# ============================================
+# METRICS COLLECTOR
+# ============================================
+class Instrumentation:
+    """Collects step records of one ETL instance and emits them"""
+
+    def __init__(self, jsonl_path=None, prometheus_path=None, profiler=None, profile_dir='./profiles'):
+        if profiler and profiler not in PROFILERS:
+            raise ValueError(f"Unknown profiler: {profiler!r} (use {' or '.join(PROFILERS)})")
+        self.jsonl_path = jsonl_path
+        self.prometheus_path = prometheus_path
+        self.profiler = profiler
+        self.profile_dir = profile_dir
+        self.records = deque(maxlen=MAX_RECORDS)
+        self.run_id = None
+        self.lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls):
+        return cls(jsonl_path=os.getenv('ETL_METRICS_JSONL') or None,
+                   prometheus_path=os.getenv('ETL_METRICS_PROM') or None,
+                   profiler=os.getenv('ETL_PROFILE') or None,
+                   profile_dir=os.getenv('ETL_PROFILE_DIR', './profiles'))
+
+    def start_profiler(self, phase):
+        """Profiler for this step if it is the outermost non-run step of its thread"""
+        if not self.profiler or phase == 'run':
+            return None
+        thread = threading.current_thread().name
+        if any(record['phase'] != 'run' and record['thread'] == thread for record in ACTIVE_STEPS.get()):
+            return None
+        profiler = StepCProfile() if self.profiler == 'cprofile' else StepSampler()
+        try:
+            profiler.start()
+        except ValueError:
+            # Python 3.12+ allows a single active cProfile per process: concurrent steps go unprofiled
+            return None
+        return profiler
+
+    @contextmanager
+    def step(self, name, phase, rows_in=None):
+        """Time a pipeline step; the yielded record can be completed (e.g. rows_out)"""
+        if phase == 'run':
+            self.run_id = datetime.now().strftime('%Y%m%dT%H%M%S.%f')[:-3]
+        stack = ACTIVE_STEPS.get()
+        record = {
+            'run_id': self.run_id,
+            'step': name,
+            'phase': phase,
+            'thread': threading.current_thread().name,
+            'parent': stack[-1]['step'] if stack else None,
+            'started_at': datetime.now().isoformat(timespec='milliseconds'),
+            'rows_in': rows_in,
+            'rows_out': None,
+            'rss_before_mb': current_rss_mb(),
+        }
+        profiler = self.start_profiler(phase)
+        token = ACTIVE_STEPS.set(stack + (record,))
+        start = time.perf_counter()
+        try:
+            yield record
+            record['status'] = 'ok'
+        except BaseException as e:
+            record['status'] = 'error'
+            record['error'] = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            record['seconds'] = round(time.perf_counter() - start, 6)
+            ACTIVE_STEPS.reset(token)
+            record['rss_after_mb'] = current_rss_mb()
+            if record['rss_before_mb'] is not None and record['rss_after_mb'] is not None:
+                record['rss_delta_mb'] = round(record['rss_after_mb'] - record['rss_before_mb'], 2)
+            if record['rows_out'] is not None and record['seconds'] > 0:
+                record['rows_per_second'] = round(record['rows_out'] / record['seconds'])
+            if profiler is not None:
+                os.makedirs(self.profile_dir, exist_ok=True)
+                record['profile_top'] = profiler.stop(os.path.join(self.profile_dir, f"{self.run_id}_{name}"))
+            self.emit(record)
+            if phase == 'run':
+                self.write_prometheus()
+
+    def emit(self, record):
+        with self.lock:
+            self.records.append(record)
+            if self.jsonl_path:
+                with open(self.jsonl_path, 'a') as f:
+                    f.write(json.dumps(record, default=str) + '\n')
+
+    def prometheus_text(self):
+        """Prometheus text exposition of the last run's steps"""
+        run = [r for r in self.records if r['run_id'] == self.run_id]
+        lines = []
+
+        def metric(name, help_text, kind, samples):
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            for labels, value in samples:
+                label_text = ','.join(f'{key}="{label}"' for key, label in labels.items())
+                lines.append(f"{name}{{{label_text}}} {value}" if label_text else f"{name} {value}")
+
+        # One series per step (a step run twice keeps its last record)
+        steps = list({(r['step'], r['phase']): r for r in run if r['phase'] != 'run'}.values())
+        labels = [{'step': r['step'], 'phase': r['phase']} for r in steps]
+        metric('etl_step_duration_seconds', 'Wall time of an ETL step', 'gauge',
+               [(label, r['seconds']) for label, r in zip(labels, steps)])
+        metric('etl_step_rows_in', 'Rows read by an ETL step', 'gauge',
+               [(label, r['rows_in']) for label, r in zip(labels, steps) if r['rows_in'] is not None])
+        metric('etl_step_rows_out', 'Rows produced by an ETL step', 'gauge',
+               [(label, r['rows_out']) for label, r in zip(labels, steps) if r['rows_out'] is not None])
+        metric('etl_step_rss_delta_megabytes', 'Change in process RSS over an ETL step', 'gauge',
+               [(label, r['rss_delta_mb']) for label, r in zip(labels, steps) if 'rss_delta_mb' in r])
+        metric('etl_step_success', '1 if the ETL step finished without error', 'gauge',
+               [(label, int(r['status'] == 'ok')) for label, r in zip(labels, steps)])
+
+        runs = [r for r in run if r['phase'] == 'run']
+        if runs:
+            last = runs[-1]
+            metric('etl_run_duration_seconds', 'Wall time of the last ETL run', 'gauge', [({}, last['seconds'])])
+            metric('etl_run_success', '1 if the last ETL run finished without error', 'gauge',
+                   [({}, int(last['status'] == 'ok'))])
+            metric('etl_run_last_timestamp_seconds', 'Unix time the last ETL run finished', 'gauge',
+                   [({}, round(time.time()))])
+        return '\n'.join(lines) + '\n'
+
+    def write_prometheus(self):
+        if not self.prometheus_path:
+            return
+        # Write then rename so a scraper never reads a half-written file
+        tmp_path = self.prometheus_path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            f.write(self.prometheus_text())
+        os.replace(tmp_path, self.prometheus_path)
+
+    def summary(self):
+        """(step, phase, seconds, rows_out) of the last run's innermost steps, slowest first"""
+        run = [r for r in self.records if r['run_id'] == self.run_id and r['phase'] != 'run']
+        parents = {r['parent'] for r in run}
+        return sorted(((r['step'], r['phase'], r['seconds'], r['rows_out']) for r in run if r['step'] not in parents),
+                      key=lambda item: item[2], reverse=True)
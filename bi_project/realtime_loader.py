@@ -0,0 +1,333 @@
+"""
+============================================
+NEAR-REAL-TIME LOADER FOR APPLE STORE SOUSSE
+Data Analytics & Business Intelligence Project
+============================================
+
+Tails MongoDB change streams on users, products and orders and applies the
+changes to the Data Warehouse in micro-batches, reusing the incremental
+upsert path of AppleStoreETL:
+
+1. A reader thread pulls change events into a bounded queue. When the
+   warehouse falls behind the queue fills up and the reader blocks, so the
+   change stream is not consumed faster than it can be applied (backpressure).
+2. The applier groups events into a micro-batch, flushed when it reaches
+   max_batch_size events or max_latency seconds after its first event.
+3. After each batch is applied, the resume token of its last event is
+   stored in the warehouse (etl_resume_token) so a restart continues exactly
+   where the previous process stopped. The watermarks (etl_watermark) advance
+   in the same transaction, so a later batch run of etl_pipeline.py does not
+   re-read what the stream already applied.
+
+Deleted orders are removed from fact_sales. Deleted users and products are
+ignored: their dimension rows stay, as past orders still refer to them.
+
+Change streams need a replica set (a single-node replica set is enough
+locally: mongod --replSet rs0). InMemoryEventSource is a stand-in for tests.
+
+Usage:
+    python realtime_loader.py --max-batch-size 500 --max-latency 2
+"""
+
+import io
+import queue
+import argparse
+import threading
+import time
+from contextlib import redirect_stdout, nullcontext
+from datetime import datetime
+
+from bson import json_util
+from sqlalchemy import text
+
+from etl_pipeline import AppleStoreETL, frame_from_documents, USER_FIELDS, PRODUCT_FIELDS, ORDER_FIELDS
+
+WATCHED_COLLECTIONS = {'users': USER_FIELDS, 'products': PRODUCT_FIELDS, 'orders': ORDER_FIELDS}
+STREAM_NAME = 'applestoresousse'
+
+
+# ============================================
+# EVENT SOURCES
+# ============================================
+class MongoChangeStreamSource:
+    """Database-level MongoDB change stream filtered to the watched collections"""
+
+    def __init__(self, mongo_db, collections=tuple(WATCHED_COLLECTIONS)):
+        self.mongo_db = mongo_db
+        self.collections = list(collections)
+        self.stream = None
+
+    def open(self, resume_after=None):
+        """Open the change stream (resuming after a stored token if given)"""
+        pipeline = [{'$match': {'ns.coll': {'$in': self.collections}}}]
+        self.stream = self.mongo_db.watch(pipeline, full_document='updateLookup',
+                                          resume_after=resume_after)
+        return self.stream.resume_token
+
+    def next_event(self, timeout):
+        """Next change event, or None if nothing arrived within timeout seconds"""
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            event = self.stream.try_next()
+            if event is not None:
+                return event
+            time.sleep(0.05)
+        return None
+
+    def close(self):
+        if self.stream is not None:
+            self.stream.close()
+
+
+class InMemoryEventSource:
+    """In-process fake change stream: tests push documents, the loader consumes events"""
+
+    def __init__(self):
+        self.events = []
+        self.position = 0
+        self.condition = threading.Condition()
+
+    def push(self, collection, operation, document=None, document_id=None):
+        """Append a change event (operation: insert / update / replace / delete)"""
+        with self.condition:
+            token = {'_data': f'{len(self.events) + 1:016d}'}
+            document_id = document_id if document_id is not None else document['_id']
+            self.events.append({
+                '_id': token,
+                'operationType': operation,
+                'ns': {'db': STREAM_NAME, 'coll': collection},
+                'documentKey': {'_id': document_id},
+                'fullDocument': document if operation != 'delete' else None,
+            })
+            self.condition.notify_all()
+            return token
+
+    def open(self, resume_after=None):
+        with self.condition:
+            self.position = 0
+            if resume_after is not None:
+                tokens = [event['_id'] for event in self.events]
+                self.position = tokens.index(resume_after) + 1
+            return self.events[self.position - 1]['_id'] if self.position else None
+
+    def next_event(self, timeout):
+        with self.condition:
+            if self.position >= len(self.events):
+                self.condition.wait(timeout)
+            if self.position >= len(self.events):
+                return None
+            event = self.events[self.position]
+            self.position += 1
+            return event
+
+    def close(self):
+        pass
+
+
+# ============================================
+# MICRO-BATCH LOADER
+# ============================================
+class ChangeStreamLoader:
+    """Applies change events to the warehouse in bounded-latency micro-batches"""
+
+    def __init__(self, etl=None, source=None, max_batch_size=500, max_latency=2.0,
+                 queue_size=10000, verbose=False):
+        self.etl = etl or AppleStoreETL()
+        self.source = source
+        self.max_batch_size = max_batch_size
+        self.max_latency = max_latency
+        self.verbose = verbose
+
+        self.events = queue.Queue(maxsize=queue_size)
+        self.stop_requested = threading.Event()
+        self.reader = None
+        self.reader_error = None
+        self.batch_stats = []
+
+    # ----- resume tokens -----
+    def create_token_table(self):
+        with self.etl.dw_engine.begin() as conn:
+            conn.execute(text("""
+                CREATE TABLE IF NOT EXISTS etl_resume_token (
+                    stream VARCHAR(50) PRIMARY KEY,
+                    token TEXT NOT NULL,
+                    updated_at TIMESTAMP
+                )
+            """))
+
+    def read_resume_token(self):
+        """Resume token stored by the last committed batch (None on first start)"""
+        with self.etl.dw_engine.connect() as conn:
+            token = conn.execute(text("SELECT token FROM etl_resume_token WHERE stream = :stream"),
+                                 {'stream': STREAM_NAME}).scalar()
+        return json_util.loads(token) if token else None
+
+    def save_resume_token(self, conn, token):
+        conn.execute(text("DELETE FROM etl_resume_token WHERE stream = :stream"), {'stream': STREAM_NAME})
+        conn.execute(text("""
+            INSERT INTO etl_resume_token (stream, token, updated_at) VALUES (:stream, :token, :updated_at)
+        """), {'stream': STREAM_NAME, 'token': json_util.dumps(token), 'updated_at': datetime.now()})
+
+    # ----- reader thread -----
+    def read_events(self):
+        """Reader thread: move events from the source into the bounded queue"""
+        try:
+            while not self.stop_requested.is_set():
+                event = self.source.next_event(timeout=0.2)
+                if event is None:
+                    continue
+                item = (time.monotonic(), event)
+                # Blocks while the queue is full: backpressure on the change stream
+                while not self.stop_requested.is_set():
+                    try:
+                        self.events.put(item, timeout=0.2)
+                        break
+                    except queue.Full:
+                        continue
+        except Exception as e:
+            self.reader_error = e
+            self.stop_requested.set()
+
+    def next_batch(self):
+        """Collect events until max_batch_size or max_latency after the first event"""
+        batch = []
+        deadline = None
+        while len(batch) < self.max_batch_size:
+            timeout = 0.2 if deadline is None else deadline - time.monotonic()
+            if timeout <= 0:
+                break
+            try:
+                item = self.events.get(timeout=timeout)
+            except queue.Empty:
+                if deadline is None:
+                    break  # idle: nothing to apply yet
+                continue
+            batch.append(item)
+            if deadline is None:
+                # From when the batch starts, not when its first event was queued: a
+                # backlog older than max_latency still fills batches of max_batch_size
+                deadline = time.monotonic() + self.max_latency
+        return batch
+
+    # ----- applying -----
+    def apply_batch(self, batch):
+        """Upsert the latest state of every document touched by the batch, then save the token"""
+        latest = {}
+        for _, event in batch:
+            key = (event['ns']['coll'], str(event['documentKey']['_id']))
+            latest[key] = event
+
+        documents = {collection: [] for collection in WATCHED_COLLECTIONS}
+        deleted_orders = []
+        for (collection, document_id), event in latest.items():
+            if event['operationType'] == 'delete' or event.get('fullDocument') is None:
+                # Deleted users / products keep their dimension rows (facts still refer to them)
+                if collection == 'orders':
+                    deleted_orders.append(document_id)
+                continue
+            documents[collection].append(event['fullDocument'])
+
+        etl = self.etl
+        with nullcontext() if self.verbose else redirect_stdout(io.StringIO()):
+            etl.watermarks = {}
+            etl.df_users = frame_from_documents(documents['users'], USER_FIELDS)
+            etl.df_products = frame_from_documents(documents['products'], PRODUCT_FIELDS)
+            etl.df_orders = frame_from_documents(documents['orders'], ORDER_FIELDS)
+            for collection, frame in (('users', etl.df_users), ('products', etl.df_products),
+                                      ('orders', etl.df_orders)):
+                etl.track_watermark(collection, frame)
+            etl.transform_changes()
+            etl.load_incremental(deleted_orders=deleted_orders)
+
+        # Watermarks only move forward: a batch run may already have stored later ones
+        stored = etl.read_watermarks()
+        etl.watermarks = {collection: max(value, stored[collection]) if collection in stored else value
+                          for collection, value in etl.watermarks.items()}
+        with etl.dw_engine.begin() as conn:
+            self.save_resume_token(conn, batch[-1][1]['_id'])
+            with nullcontext() if self.verbose else redirect_stdout(io.StringIO()):
+                etl.write_watermarks(conn)
+
+        applied_at = time.monotonic()
+        stats = {
+            'events': len(batch),
+            'documents': len(latest),
+            'orders': len(documents['orders']) + len(deleted_orders),
+            'fact_rows': 0 if etl.fact_sales is None else len(etl.fact_sales),
+            'max_lag_s': applied_at - batch[0][0],
+            'queue_depth': self.events.qsize(),
+        }
+        self.batch_stats.append(stats)
+        print(f"   ✓ Applied {stats['events']} events ({stats['documents']} documents, "
+              f"{stats['fact_rows']} fact rows) | lag {stats['max_lag_s']:.2f}s "
+              f"| queue {stats['queue_depth']}")
+        return stats
+
+    # ----- lifecycle -----
+    def start(self):
+        """Prepare the warehouse, open the stream from the stored token and start the reader"""
+        etl = self.etl
+        etl.open_datawarehouse()
+        if self.source is None:
+            etl.connect_mongodb()
+            self.source = MongoChangeStreamSource(etl.mongo_db)
+        self.create_token_table()
+
+        token = self.read_resume_token()
+        if token is None:
+            # First start: open the stream before catching up so nothing falls in between
+            token = self.source.open()
+            print("\nℹ️  No resume token: catching up with a regular ETL run first")
+            # The change stream reads through the ETL's client: keep it open
+            etl.run(export_csv=False, close_mongo=False)
+            if token is not None:
+                with etl.dw_engine.begin() as conn:
+                    self.save_resume_token(conn, token)
+        else:
+            self.source.open(resume_after=token)
+
+        self.stop_requested.clear()
+        self.reader = threading.Thread(target=self.read_events, name='change-stream-reader', daemon=True)
+        self.reader.start()
+        print(f"\n👀 Watching {', '.join(WATCHED_COLLECTIONS)} "
+              f"(batch ≤ {self.max_batch_size} events, latency ≤ {self.max_latency}s)")
+
+    def run_once(self):
+        """Apply one micro-batch if events are pending (returns its stats or None)"""
+        batch = self.next_batch()
+        return self.apply_batch(batch) if batch else None
+
+    def stop(self):
+        """Stop reading, apply what is already queued and close the stream"""
+        self.stop_requested.set()
+        if self.reader is not None:
+            self.reader.join()
+        while not self.events.empty():
+            self.run_once()
+        self.source.close()
+        if self.reader_error is not None:
+            raise self.reader_error
+
+    def run_forever(self):
+        self.start()
+        try:
+            while not self.stop_requested.is_set():
+                self.run_once()
+        except KeyboardInterrupt:
+            print("\n⏹️  Stopping...")
+        finally:
+            self.stop()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Apply MongoDB change streams to the warehouse")
+    parser.add_argument('--max-batch-size', type=int, default=500, help='Events per micro-batch')
+    parser.add_argument('--max-latency', type=float, default=2.0,
+                        help='Seconds after its first event before a batch is applied')
+    parser.add_argument('--queue-size', type=int, default=10000,
+                        help='Events buffered before the change stream is paused')
+    parser.add_argument('--verbose', action='store_true', help='Show the ETL output of every batch')
+    args = parser.parse_args()
+
+    ChangeStreamLoader(max_batch_size=args.max_batch_size, max_latency=args.max_latency,
+                       queue_size=args.queue_size, verbose=args.verbose).run_forever()
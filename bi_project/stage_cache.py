@@ -0,0 +1,217 @@
+"""
+============================================
+STAGE CACHE (PIPELINE CHECKPOINTS)
+Data Analytics & Business Intelligence Project
+============================================
+
+Local checkpoints of the extract / transform / load stages of a full
+AppleStoreETL run, so a failed or repeated run resumes where it stopped
+instead of re-reading MongoDB:
+
+- every stage output is stored under <ETL_CACHE_DIR>/<stage>/<key>/ as one
+  Parquet file per DataFrame (pickle if pyarrow is missing or a column cannot
+  be converted) plus a manifest.json with row counts, size and metadata
+- the key is a fingerprint of the stage's inputs (source collections,
+  settings, upstream key): a stage whose key is cached is skipped
+- entries older than ETL_CACHE_MAX_AGE_DAYS are evicted, then the least
+  recently used ones until the cache fits in ETL_CACHE_MAX_MB
+- invalidate() removes every entry (or those of some stages)
+
+Entries are written to a temporary directory and renamed, so an interrupted
+save never leaves a partial checkpoint behind.
+"""
+
+import hashlib
+import os
+import shutil
+import time
+import uuid
+from datetime import datetime
+
+import pandas as pd
+from bson import ObjectId, json_util
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # optional dependency: checkpoints fall back to pickle
+    pa = pq = None
+
+STAGES = ('extract', 'transform', 'load')
+# Bumped when the on-disk layout changes (older entries are then never matched)
+CACHE_FORMAT = 1
+
+
+def fingerprint(*parts):
+    """Short stable hash of JSON-serializable parts (ObjectId and datetime included)"""
+    payload = json_util.dumps([CACHE_FORMAT, *parts], sort_keys=True)
+    return hashlib.sha256(payload.encode()).hexdigest()[:20]
+
+
+def plain_value(value):
+    """Value with ObjectIds as strings, also inside documents and arrays"""
+    if isinstance(value, ObjectId):
+        return str(value)
+    if isinstance(value, dict):
+        return {key: plain_value(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [plain_value(item) for item in value]
+    return value
+
+
+def write_frame(frame, path):
+    """Write a DataFrame as path.parquet (or path.pkl); returns the file name"""
+    if pa is not None:
+        plain = frame.assign(**{column: frame[column].map(plain_value)
+                                for column in frame.columns if frame[column].dtype == object})
+        try:
+            table = pa.Table.from_pandas(plain, preserve_index=False)
+        except (pa.ArrowInvalid, pa.ArrowTypeError, pa.ArrowNotImplementedError):
+            table = None  # e.g. mixed types in a document field
+        if table is not None:
+            pq.write_table(table, path + '.parquet', compression='zstd')
+            return os.path.basename(path) + '.parquet'
+    frame.to_pickle(path + '.pkl')
+    return os.path.basename(path) + '.pkl'
+
+
+def read_frame(path):
+    """Read a frame written by write_frame (arrays come back as Python lists)"""
+    if path.endswith('.pkl'):
+        return pd.read_pickle(path)
+    table = pq.read_table(path)
+    lists = [field.name for field in table.schema if pa.types.is_list(field.type)]
+    frame = table.drop(lists).to_pandas()
+    for column in lists:
+        frame[column] = table.column(column).to_pylist()
+    return frame[table.column_names]
+
+
+def directory_size(path):
+    return sum(os.path.getsize(os.path.join(root, name)) for root, _, names in os.walk(path) for name in names)
+
+
+class StageCache:
+    """Checkpoints of pipeline stages in a local directory"""
+
+    def __init__(self, directory, max_mb=2048, max_age_days=7):
+        self.directory = directory
+        self.max_mb = max_mb
+        self.max_age_days = max_age_days
+
+    @classmethod
+    def from_env(cls, directory=None):
+        """Cache in directory or ETL_CACHE_DIR (None when neither is set)"""
+        directory = directory or os.getenv('ETL_CACHE_DIR')
+        if not directory:
+            return None
+        return cls(directory, max_mb=float(os.getenv('ETL_CACHE_MAX_MB', '2048')),
+                   max_age_days=float(os.getenv('ETL_CACHE_MAX_AGE_DAYS', '7')))
+
+    def entry_path(self, stage, key):
+        return os.path.join(self.directory, stage, key)
+
+    def read_manifest(self, path):
+        try:
+            with open(os.path.join(path, 'manifest.json')) as f:
+                return json_util.loads(f.read())
+        except (OSError, ValueError):
+            return None
+
+    def write_manifest(self, path, manifest):
+        tmp_path = os.path.join(path, 'manifest.json.tmp')
+        with open(tmp_path, 'w') as f:
+            f.write(json_util.dumps(manifest, indent=2))
+        os.replace(tmp_path, os.path.join(path, 'manifest.json'))
+
+    def restore(self, stage, key, frames=True):
+        """(frames, meta) of a cached stage output, None if it is not cached
+
+        frames=False only reads the metadata.
+        """
+        path = self.entry_path(stage, key)
+        manifest = self.read_manifest(path)
+        if manifest is None:
+            return None
+        data = {}
+        if frames:
+            try:
+                data = {name: read_frame(os.path.join(path, entry['file']))
+                        for name, entry in manifest['frames'].items()}
+            except (OSError, ValueError) as e:
+                print(f"   ⚠️  Unreadable {stage} checkpoint {key}, ignoring it: {e}")
+                shutil.rmtree(path, ignore_errors=True)
+                return None
+        manifest['last_used'] = time.time()
+        self.write_manifest(path, manifest)
+        return data, manifest['meta']
+
+    def save(self, stage, key, frames, meta=None):
+        """Checkpoint a stage output (DataFrames by name), then evict old entries"""
+        path = self.entry_path(stage, key)
+        tmp_path = os.path.join(self.directory, stage, f'.{key}.{uuid.uuid4().hex}.tmp')
+        os.makedirs(tmp_path)
+        manifest = {
+            'stage': stage,
+            'key': key,
+            'created_at': datetime.now().isoformat(timespec='seconds'),
+            'last_used': time.time(),
+            'frames': {name: {'file': write_frame(frame, os.path.join(tmp_path, name)), 'rows': len(frame)}
+                       for name, frame in frames.items()},
+            'meta': meta or {},
+        }
+        manifest['bytes'] = directory_size(tmp_path)
+        self.write_manifest(tmp_path, manifest)
+        shutil.rmtree(path, ignore_errors=True)
+        os.replace(tmp_path, path)
+        self.evict(keep={(stage, key)})
+        return manifest
+
+    def entries(self, stages=STAGES):
+        """Manifests of the cached entries"""
+        manifests = []
+        for stage in stages:
+            stage_dir = os.path.join(self.directory, stage)
+            if not os.path.isdir(stage_dir):
+                continue
+            for key in os.listdir(stage_dir):
+                manifest = None if key.startswith('.') else self.read_manifest(os.path.join(stage_dir, key))
+                if manifest is not None:
+                    manifests.append(manifest)
+        return manifests
+
+    def remove(self, manifest):
+        shutil.rmtree(self.entry_path(manifest['stage'], manifest['key']), ignore_errors=True)
+
+    def evict(self, keep=()):
+        """Drop entries past max_age_days, then least recently used ones above max_mb"""
+        removed = []
+        now = time.time()
+        entries = sorted(self.entries(), key=lambda manifest: manifest['last_used'])
+        for manifest in list(entries):
+            if (manifest['stage'], manifest['key']) in keep:
+                continue
+            if now - manifest['last_used'] > self.max_age_days * 86400:
+                self.remove(manifest)
+                entries.remove(manifest)
+                removed.append(manifest)
+        total = sum(manifest['bytes'] for manifest in entries)
+        for manifest in entries:
+            if total <= self.max_mb * 1024 ** 2:
+                break
+            if (manifest['stage'], manifest['key']) in keep:
+                continue
+            self.remove(manifest)
+            total -= manifest['bytes']
+            removed.append(manifest)
+        return removed
+
+    def invalidate(self, stages=STAGES):
+        """Remove every entry of the given stages (including interrupted saves)"""
+        removed = self.entries(stages)
+        for stage in stages:
+            shutil.rmtree(os.path.join(self.directory, stage), ignore_errors=True)
+        return removed
+
+    def size_mb(self):
+        return sum(manifest['bytes'] for manifest in self.entries()) / 1024 ** 2
@@ -0,0 +1,103 @@
+"""
+ChangeStreamLoader.run_once() against the in-memory Mongo stand-in and event source
+
+    cd bi_project && python -m pytest tests
+"""
+
+import os
+import sqlite3
+import sys
+from datetime import datetime
+
+import pytest
+from bson import ObjectId
+
+BI_PROJECT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [BI_PROJECT, os.path.join(BI_PROJECT, 'benchmarks')]
+
+import etl_pipeline  # noqa: E402
+from realtime_loader import ChangeStreamLoader, InMemoryEventSource, STREAM_NAME  # noqa: E402
+from synthetic_data import generate_documents, InMemoryMongoClient  # noqa: E402
+
+LATER = datetime(2026, 1, 1)
+
+
+@pytest.fixture
+def warehouse(tmp_path, monkeypatch):
+    """Synthetic collections with one half-bad order, served to AppleStoreETL in memory"""
+    documents = generate_documents(300, seed=7)
+    bad_order = documents['orders'][0]
+    bad_order['orderItems'].append({'product': ObjectId(), 'name': 'Unknown', 'price': 10.0, 'quantity': 1})
+    bad_order['totalPrice'] = round(bad_order['totalPrice'] + 10.0, 2)
+
+    client = InMemoryMongoClient(documents)
+    db_path = tmp_path / 'dw.db'
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(etl_pipeline, 'MongoClient', client)
+    monkeypatch.setattr(etl_pipeline, 'DW_URI', f'sqlite:///{db_path}')
+    return client.get_database(), bad_order, db_path
+
+
+def query(db_path, sql, *params):
+    with sqlite3.connect(db_path) as conn:
+        return conn.execute(sql, params).fetchall()
+
+
+def drain(loader, source):
+    while loader.events.qsize() or source.position < len(source.events):
+        loader.run_once()
+
+
+def test_run_once_applies_inserts_updates_and_deletes(warehouse):
+    db, bad_order, db_path = warehouse
+    bad_id = str(bad_order['_id'])
+    source = InMemoryEventSource()
+    loader = ChangeStreamLoader(source=source, max_batch_size=2, max_latency=0.2)
+    loader.start()
+
+    # The catch-up run loads the good lines of the bad order and quarantines the unknown product
+    assert query(db_path, "SELECT COUNT(*) FROM fact_sales WHERE order_mongo_id = ?", bad_id)[0][0] == \
+        len(bad_order['orderItems']) - 1
+    assert query(db_path, "SELECT COUNT(*) FROM etl_quarantine WHERE order_mongo_id = ?", bad_id)[0][0] == 1
+
+    # Insert: a new order for an existing customer
+    product = db.products.documents[0]
+    order = dict(db.orders.documents[1], _id=ObjectId(), createdAt=LATER, updatedAt=LATER,
+                 orderItems=[{'product': product['_id'], 'name': product['name'],
+                              'price': product['price'], 'quantity': 2}],
+                 taxPrice=0.0, shippingPrice=0.0, totalPrice=product['price'] * 2)
+    db.orders.documents.append(order)
+    source.push('orders', 'insert', order)
+
+    # Update: a customer changes name and email (SCD type 2 attributes)
+    user = db.users.documents[1]
+    user.update(name='Renamed Customer', email='renamed@example.tn', updatedAt=LATER)
+    source.push('users', 'update', user)
+
+    # Delete: the bad order disappears with its fact and quarantine rows
+    db.orders.documents.remove(bad_order)
+    last_token = source.push('orders', 'delete', document_id=bad_order['_id'])
+
+    drain(loader, source)
+    loader.stop()
+
+    assert query(db_path, "SELECT quantity, unit_price FROM fact_sales WHERE order_mongo_id = ?",
+                 str(order['_id'])) == [(2, product['price'])]
+
+    versions = query(db_path, """
+        SELECT customer_name, email, is_current FROM dim_customer WHERE mongo_id = ? ORDER BY valid_from
+    """, str(user['_id']))
+    assert len(versions) == 2
+    assert versions[0][2] == 0
+    assert versions[1] == ('Renamed Customer', 'renamed@example.tn', 1)
+
+    assert query(db_path, "SELECT COUNT(*) FROM fact_sales WHERE order_mongo_id = ?", bad_id)[0][0] == 0
+    assert query(db_path, "SELECT COUNT(*) FROM etl_quarantine WHERE order_mongo_id = ?", bad_id)[0][0] == 0
+
+    # Committed with the last batch: the resume token of the last event and the new watermarks
+    loader.create_token_table()
+    assert loader.read_resume_token() == last_token
+    assert query(db_path, "SELECT stream FROM etl_resume_token") == [(STREAM_NAME,)]
+    watermarks = dict(query(db_path, "SELECT collection, watermark FROM etl_watermark"))
+    assert watermarks['orders'] == LATER.isoformat()
+    assert watermarks['users'] == LATER.isoformat()